@@ -2,10 +2,35 @@
 Shared model configuration for sub-agents.
 
 The main agent module calls set_model() before importing the sub-agents,
-so every agent in the pipeline uses the same LLM provider/model.
+so every agent in the pipeline uses the same LLM provider/model. Sub-agent
+instances and their recent responses are cached here as well, and tool
+labels for the LangWatch trace are batched per turn.
 """
 
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import langwatch
+
+latency_logger = logging.getLogger("agents.latency")
+
 _model = None
+_agents = {}
+
+# Responses for identical (agent, model, prompt) requests, most recently used last
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL_SECONDS = 300
+_responses = OrderedDict()
+
+_tracing_initialized = False
+
+# Labels collected during the current turn; None outside batch_trace_labels(). A ContextVar
+# rather than a thread-local, so concurrent async turns on one thread keep separate buffers.
+_label_batch = ContextVar("trace_label_batch", default=None)
 
 
 def set_model(model):
@@ -19,3 +44,167 @@ def get_model():
             "agent_config.set_model() must be called before importing sub-agents"
         )
     return _model
+
+
+def get_agent(factory):
+    """
+    Return the agent built by factory, building it once per configured model.
+
+    Sub-agents are stateless between calls, so the same instance is reused
+    instead of being reconstructed on every request. Calling set_model()
+    with a different model rebuilds the agent on next use.
+    """
+    model = get_model()
+    agent = _agents.get(factory)
+    if agent is None or agent.model is not model:
+        agent = _agents[factory] = factory()
+    return agent
+
+
+def reset_agents():
+    """Drop all cached sub-agents, e.g. between tests"""
+    _agents.clear()
+
+
+def _response_key(agent, prompt, session_id):
+    digest = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    return (agent.name, agent.model.id, session_id, digest)
+
+
+def _cached_response(key):
+    entry = _responses.get(key)
+    if entry is None:
+        return None
+    expires_at, response = entry
+    if expires_at < time.monotonic():
+        del _responses[key]
+        return None
+    _responses.move_to_end(key)
+    return response
+
+
+def _store_response(key, response):
+    _responses[key] = (time.monotonic() + RESPONSE_CACHE_TTL_SECONDS, response)
+    _responses.move_to_end(key)
+    while len(_responses) > RESPONSE_CACHE_SIZE:
+        _responses.popitem(last=False)
+
+
+def _log_latency(call_name, prompt, started_at):
+    latency_ms = (time.perf_counter() - started_at) * 1000
+    prompt_tokens = len(prompt) // 4  # rough estimate, ~4 characters per token
+    latency_logger.info(
+        "call=%s latency_ms=%.1f prompt_tokens=%d",
+        call_name,
+        latency_ms,
+        prompt_tokens,
+        extra={"call": call_name, "latency_ms": latency_ms, "prompt_tokens": prompt_tokens},
+    )
+
+
+def timed_run(agent, prompt, call_name, session_id=None):
+    """Run agent on prompt and log the call latency to the agents.latency logger"""
+    started_at = time.perf_counter()
+    response = agent.run(prompt, session_id=session_id)
+    _log_latency(call_name, prompt, started_at)
+    return response
+
+
+async def atimed_run(agent, prompt, call_name, session_id=None):
+    """Async variant of timed_run"""
+    started_at = time.perf_counter()
+    response = await agent.arun(prompt, session_id=session_id)
+    _log_latency(call_name, prompt, started_at)
+    return response
+
+
+async def atimed_stream(agent, prompt, call_name, session_id=None):
+    """Streaming variant of atimed_run, yielding the run events and logging the latency once the stream ends"""
+    started_at = time.perf_counter()
+    try:
+        async for event in agent.arun(prompt, stream=True, session_id=session_id):
+            yield event
+    finally:
+        _log_latency(call_name, prompt, started_at)
+
+
+def cached_run(agent, prompt, call_name, session_id=None):
+    """
+    Run agent on prompt, reusing the response of an identical recent request.
+
+    Page refreshes and retries send the exact same prompt again; those are
+    served from memory for RESPONSE_CACHE_TTL_SECONDS instead of calling the LLM.
+    Calls that do reach the LLM are timed, see timed_run().
+
+    Agents are shared between conversations (see get_agent()), so callers pass
+    the conversation's session_id to keep each run in its own session. Cache
+    hits return the same response object, so callers hand out copies of its
+    content rather than the content itself.
+    """
+    key = _response_key(agent, prompt, session_id)
+    response = _cached_response(key)
+    if response is None:
+        response = timed_run(agent, prompt, call_name, session_id)
+        _store_response(key, response)
+    return response
+
+
+async def acached_run(agent, prompt, call_name, session_id=None):
+    """Async variant of cached_run"""
+    key = _response_key(agent, prompt, session_id)
+    response = _cached_response(key)
+    if response is None:
+        response = await atimed_run(agent, prompt, call_name, session_id)
+        _store_response(key, response)
+    return response
+
+
+def clear_response_cache():
+    """Drop all cached responses, e.g. between tests"""
+    _responses.clear()
+
+
+def setup_tracing():
+    """
+    Set up LangWatch tracing with the Agno instrumentor, once per process.
+
+    Every support agent module calls this at import; later calls are no-ops,
+    so importing several provider variants (e.g. in one test session) doesn't
+    register the tracer provider and instrument Agno again.
+    """
+    global _tracing_initialized
+    if _tracing_initialized:
+        return
+    from openinference.instrumentation.agno import AgnoInstrumentor
+
+    langwatch.setup(instrumentors=[AgnoInstrumentor()])
+    _tracing_initialized = True
+
+
+def add_trace_label(label):
+    """Label the current LangWatch trace, deferred to the end of the turn inside batch_trace_labels()"""
+    pending = _label_batch.get()
+    if pending is None:
+        langwatch.get_current_trace().update(metadata={"labels": [label]})
+    else:
+        pending.append(label)
+
+
+@contextmanager
+def batch_trace_labels(name="support_agent_turn"):
+    """
+    Run a turn in its own LangWatch trace, labelled with one update at the end.
+
+    The agent run's spans nest under the turn's trace, and the labels tools add
+    during the turn are sent to that trace just before it closes. Turns where no
+    tool added a label skip the trace update entirely.
+    """
+    with langwatch.trace(name=name) as trace:
+        pending = []
+        token = _label_batch.set(pending)
+        try:
+            yield
+        finally:
+            _label_batch.reset(token)
+            if pending:
+                trace.update(metadata={"labels": pending})
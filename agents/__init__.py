@@ -5,18 +5,35 @@ This module contains specialized AI agents for bank customer support:
 - Summary Agent: Analyzes conversation threads and provides sentiment analysis
 - Next Message Agent: Suggests appropriate responses using knowledge base
 - Customer Explorer Agent: Provides rich customer data experiences
+- Pipeline: Runs the agents above concurrently for a customer turn
 """
 
-from .summary_agent import summarize_conversation, MessageSummary
-from .next_message_agent import suggest_next_message, NextMessageSuggestion
-from .customer_explorer_agent import explore_customer_context, analyze_customer_behavior, RichExperience
+from .summary_agent import summarize_conversation, summarize_conversation_async, MessageSummary
+from .next_message_agent import suggest_next_message, suggest_next_message_async, NextMessageSuggestion
+from .customer_explorer_agent import (
+    explore_customer_context,
+    explore_customer_context_async,
+    explore_customer_context_stream,
+    analyze_customer_behavior,
+    invalidate_customer_behavior,
+    RichExperience
+)
+from .pipeline import run_pipeline, run_pipeline_async, PipelineResult
 
 __all__ = [
     "summarize_conversation",
+    "summarize_conversation_async",
     "MessageSummary",
     "suggest_next_message",
+    "suggest_next_message_async",
     "NextMessageSuggestion",
     "explore_customer_context",
+    "explore_customer_context_async",
+    "explore_customer_context_stream",
     "analyze_customer_behavior",
-    "RichExperience"
+    "invalidate_customer_behavior",
+    "RichExperience",
+    "run_pipeline",
+    "run_pipeline_async",
+    "PipelineResult"
 ]
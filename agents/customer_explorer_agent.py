@@ -1,30 +1,43 @@
 """
 Customer Explorer Agent - Provides rich customer data experiences for bank agents
 """
-import os
-from typing import List, Dict, Any, Optional
+import copy
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Dict, Any, Optional, AsyncIterator, Sequence, Tuple
 import dotenv
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.models.nebius import Nebius
-from pydantic import BaseModel
-from datetime import datetime, timedelta
-import json
+from agno.run.agent import RunContentEvent
+from pydantic import BaseModel, ConfigDict, RootModel, ValidationError
 import agent_config
 
 dotenv.load_dotenv()
 
+class Transaction(BaseModel):
+    """One account transaction; negative amounts are debits"""
+    model_config = ConfigDict(frozen=True)
+
+    date: str
+    amount: float
+    description: str
+    category: str
+
 class CustomerProfile(BaseModel):
     """Complete customer profile with banking data"""
+    model_config = ConfigDict(frozen=True)
+
     customer_id: str
     name: str
     account_type: str
     account_balance: float
     credit_score: int
     relationship_length_years: int
-    recent_transactions: List[Dict[str, Any]]
-    active_products: List[str]
-    alerts: List[str]
+    recent_transactions: Tuple[Transaction, ...]
+    active_products: Tuple[str, ...]
+    alerts: Tuple[str, ...]
     risk_level: str  # low, medium, high
 
 class RichExperience(BaseModel):
@@ -36,6 +49,9 @@ class RichExperience(BaseModel):
     priority: str  # high, medium, low
     context: str  # Why this component is relevant
 
+class RichExperienceList(RootModel[List[RichExperience]]):
+    """Array of rich experience components as returned by the explorer agent"""
+
 # Mock customer database - in production this would be a real database
 CUSTOMER_DATABASE = {
     "CUST_001": {
@@ -76,6 +92,12 @@ CUSTOMER_DATABASE = {
     }
 }
 
+# Profiles validated once at import; lookups hand out these shared, immutable instances
+_CUSTOMER_PROFILES = {
+    customer_id: CustomerProfile(**data)
+    for customer_id, data in CUSTOMER_DATABASE.items()
+}
+
 CUSTOMER_EXPLORER_SYSTEM_PROMPT = """
 You are a specialized AI agent that helps bank customer support agents explore and understand customer data to provide rich, contextual experiences.
 
@@ -109,10 +131,35 @@ def get_customer_data(customer_id: str) -> Optional[CustomerProfile]:
     Returns:
         CustomerProfile if found, None otherwise
     """
-    if customer_id in CUSTOMER_DATABASE:
-        data = CUSTOMER_DATABASE[customer_id]
-        return CustomerProfile(**data)
-    return None
+    return _CUSTOMER_PROFILES.get(customer_id)
+
+# Static instructions of the per-request prompt, built once at import and sent
+# ahead of the customer data so every request shares the same prefix
+EXPLORER_PROMPT_PREFIX = """Based on the customer profile and query, create relevant rich experience components for the support agent.
+
+Create 1-3 relevant rich experience components. Each component should provide actionable insights or tools.
+
+Available component types:
+- account_summary: Overview of account status
+- transaction_analysis: Transaction patterns and insights
+- card_management: Credit/debit card controls
+- alert_center: Important notifications and actions
+- product_recommendations: Suitable banking products
+- risk_assessment: Fraud or financial risk indicators
+- payment_assistance: Help with payments or transfers
+
+Respond in JSON format with an array of components:
+[
+    {
+        "component_type": "component_type_here",
+        "title": "Component Title",
+        "data": {"key": "value", "another_key": "another_value"},
+        "actions": [{"label": "Action Name", "id": "action_id"}],
+        "priority": "high/medium/low",
+        "context": "Why this component is relevant"
+    }
+]
+"""
 
 def create_customer_explorer_agent() -> Agent:
     """Create and return the customer explorer agent"""
@@ -120,98 +167,73 @@ def create_customer_explorer_agent() -> Agent:
         name="CustomerExplorerAgent",
         model=agent_config.get_model(),
         description=CUSTOMER_EXPLORER_SYSTEM_PROMPT,
-        add_history_to_context=True,
+        add_history_to_context=False,
     )
 
-def explore_customer_context(
-    customer_id: str,
+def _customer_not_found(customer_id: str) -> List[RichExperience]:
+    """Error component returned when the customer lookup fails"""
+    return [RichExperience(
+        component_type="error",
+        title="Customer Not Found",
+        data={"error": f"No customer found with ID: {customer_id}"},
+        actions=[],
+        priority="high",
+        context="Customer lookup failed"
+    )]
+
+# Transactions beyond this are left out of the prompt; the most recent ones are kept
+MAX_PROMPT_TRANSACTIONS = 10
+
+def _compact_transactions(transactions: Sequence[Transaction], limit: int = MAX_PROMPT_TRANSACTIONS) -> str:
+    """Render the most recent transactions one per line, which costs far fewer tokens than indented JSON"""
+    recent = sorted(transactions, key=attrgetter("date"), reverse=True)[:limit]
+    return "\n".join(
+        f"{t.date}|{t.amount:.2f}|{t.description}|{t.category}"
+        for t in recent
+    )
+
+@lru_cache(maxsize=1024)
+def _profile_block(customer_id: str) -> str:
+    """Render the profile and transaction section of the explorer prompt, once per customer"""
+    customer_profile = _CUSTOMER_PROFILES[customer_id]
+    return f"""Customer Profile:
+- Name: {customer_profile.name}
+- Account Type: {customer_profile.account_type}
+- Balance: ${customer_profile.account_balance:,.2f}
+- Credit Score: {customer_profile.credit_score}
+- Relationship: {customer_profile.relationship_length_years} years
+- Active Products: {', '.join(customer_profile.active_products)}
+- Alerts: {', '.join(customer_profile.alerts)}
+- Risk Level: {customer_profile.risk_level}
+
+Recent Transactions (date|amount|description|category):
+{_compact_transactions(customer_profile.recent_transactions)}"""
+
+def _build_explorer_prompt(
+    customer_profile: CustomerProfile,
     query: str,
     conversation_context: Optional[List[Dict[str, Any]]] = None
-) -> List[RichExperience]:
-    """
-    Explore customer data and create rich experiences based on query
-
-    Args:
-        customer_id: The customer's unique identifier
-        query: What the agent is looking for or the customer's issue
-        conversation_context: Recent conversation for additional context
-
-    Returns:
-        List of RichExperience components relevant to the query
-    """
-    agent = create_customer_explorer_agent()
-
-    # Get customer data
-    customer_profile = get_customer_data(customer_id)
-    if not customer_profile:
-        return [RichExperience(
-            component_type="error",
-            title="Customer Not Found",
-            data={"error": f"No customer found with ID: {customer_id}"},
-            actions=[],
-            priority="high",
-            context="Customer lookup failed"
-        )]
-
+) -> str:
+    """Build the rich experience prompt from the customer profile and query"""
     # Format conversation context
     conversation_text = ""
     if conversation_context:
-        conversation_text = "\n\nRecent Conversation:\n"
-        for msg in conversation_context[-3:]:
-            role = msg.get('role', 'unknown')
-            content = msg.get('content', '')
-            conversation_text += f"{role.title()}: {content}\n"
-
-    prompt = f"""
-    Based on the customer profile and query, create relevant rich experience components for the support agent.
-
-    Customer Profile:
-    - Name: {customer_profile.name}
-    - Account Type: {customer_profile.account_type}
-    - Balance: ${customer_profile.account_balance:,.2f}
-    - Credit Score: {customer_profile.credit_score}
-    - Relationship: {customer_profile.relationship_length_years} years
-    - Active Products: {', '.join(customer_profile.active_products)}
-    - Alerts: {', '.join(customer_profile.alerts)}
-    - Risk Level: {customer_profile.risk_level}
-
-    Recent Transactions:
-    {json.dumps(customer_profile.recent_transactions, indent=2)}
-
-    Agent Query: {query}
-    {conversation_text}
-
-    Create 1-3 relevant rich experience components. Each component should provide actionable insights or tools.
-
-    Available component types:
-    - account_summary: Overview of account status
-    - transaction_analysis: Transaction patterns and insights
-    - card_management: Credit/debit card controls
-    - alert_center: Important notifications and actions
-    - product_recommendations: Suitable banking products
-    - risk_assessment: Fraud or financial risk indicators
-    - payment_assistance: Help with payments or transfers
-
-    Respond in JSON format with an array of components:
-    [
-        {{
-            "component_type": "component_type_here",
-            "title": "Component Title",
-            "data": {{"key": "value", "another_key": "another_value"}},
-            "actions": [{{"label": "Action Name", "id": "action_id"}}],
-            "priority": "high/medium/low",
-            "context": "Why this component is relevant"
-        }}
-    ]
-    """
+        conversation_text = "\n\nRecent Conversation:\n" + "".join(
+            f"{msg.get('role', 'unknown').title()}: {msg.get('content', '')}\n"
+            for msg in conversation_context[-3:]
+        )
+
+    return f"""{EXPLORER_PROMPT_PREFIX}
+{_profile_block(customer_profile.customer_id)}
 
-    response = agent.run(prompt)
+Agent Query: {query}
+{conversation_text}"""
 
-    # Parse the response
+def _parse_experiences(content: str, customer_profile: CustomerProfile) -> List[RichExperience]:
+    """Parse the agent response into RichExperience components, falling back on parse errors"""
     try:
-        components_data = json.loads(response.content)
-        return [RichExperience(**comp) for comp in components_data]
-    except (json.JSONDecodeError, Exception) as e:
+        return RichExperienceList.model_validate_json(content).root
+    except ValidationError:
         # Fallback if JSON parsing fails
         return [RichExperience(
             component_type="account_summary",
@@ -229,30 +251,270 @@ def explore_customer_context(
             context="Basic customer information for support context"
         )]
 
+def explore_customer_context(
+    customer_id: str,
+    query: str,
+    conversation_context: Optional[List[Dict[str, Any]]] = None,
+    session_id: Optional[str] = None
+) -> List[RichExperience]:
+    """
+    Explore customer data and create rich experiences based on query
+
+    Args:
+        customer_id: The customer's unique identifier
+        query: What the agent is looking for or the customer's issue
+        conversation_context: Recent conversation for additional context
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Returns:
+        List of RichExperience components relevant to the query
+    """
+    # Get customer data
+    customer_profile = get_customer_data(customer_id)
+    if not customer_profile:
+        return _customer_not_found(customer_id)
+
+    agent = agent_config.get_agent(create_customer_explorer_agent)
+    prompt = _build_explorer_prompt(customer_profile, query, conversation_context)
+    response = agent_config.cached_run(agent, prompt, "explorer", session_id)
+    return _parse_experiences(response.content, customer_profile)
+
+async def explore_customer_context_async(
+    customer_id: str,
+    query: str,
+    conversation_context: Optional[List[Dict[str, Any]]] = None,
+    session_id: Optional[str] = None
+) -> List[RichExperience]:
+    """
+    Async variant of explore_customer_context, so it can run alongside other agents
+
+    Args:
+        customer_id: The customer's unique identifier
+        query: What the agent is looking for or the customer's issue
+        conversation_context: Recent conversation for additional context
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Returns:
+        List of RichExperience components relevant to the query
+    """
+    # Get customer data
+    customer_profile = get_customer_data(customer_id)
+    if not customer_profile:
+        return _customer_not_found(customer_id)
+
+    agent = agent_config.get_agent(create_customer_explorer_agent)
+    prompt = _build_explorer_prompt(customer_profile, query, conversation_context)
+    response = await agent_config.acached_run(agent, prompt, "explorer", session_id)
+    return _parse_experiences(response.content, customer_profile)
+
+async def explore_customer_context_stream(
+    customer_id: str,
+    query: str,
+    conversation_context: Optional[List[Dict[str, Any]]] = None,
+    session_id: Optional[str] = None
+) -> AsyncIterator[RichExperience]:
+    """
+    Stream rich experiences as the agent generates them
+
+    Each component is yielded as soon as its closing brace streams in, so the
+    support interface can render the first card while the rest is generated.
+    The account summary fallback is only yielded when no card was streamed.
+
+    Args:
+        customer_id: The customer's unique identifier
+        query: What the agent is looking for or the customer's issue
+        conversation_context: Recent conversation for additional context
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Yields:
+        RichExperience components relevant to the query
+    """
+    # Get customer data
+    customer_profile = get_customer_data(customer_id)
+    if not customer_profile:
+        for experience in _customer_not_found(customer_id):
+            yield experience
+        return
+
+    agent = agent_config.get_agent(create_customer_explorer_agent)
+    prompt = _build_explorer_prompt(customer_profile, query, conversation_context)
+
+    chunks = []
+    scanner = _ArrayElementScanner()
+    emitted: List[RichExperience] = []
+    async for event in agent_config.atimed_stream(agent, prompt, "explorer_stream", session_id):
+        if not isinstance(event, RunContentEvent) or not isinstance(event.content, str):
+            continue
+        chunks.append(event.content)
+        for element in scanner.feed(event.content):
+            try:
+                experience = RichExperience.model_validate_json(element)
+            except ValidationError:
+                # Not a component - leave it to the full parse below
+                scanner.abandon()
+                break
+            emitted.append(experience)
+            yield experience
+
+    experiences = _parse_experiences("".join(chunks), customer_profile)
+    if not emitted:
+        for experience in experiences:
+            yield experience
+    elif experiences[:len(emitted)] == emitted:
+        for experience in experiences[len(emitted):]:
+            yield experience
+    # Otherwise the full parse disagrees with the cards already rendered (e.g. it fell
+    # back to the account summary); those can't be taken back, so stop after them
+
+class _ArrayElementScanner:
+    """
+    Split a streamed JSON array into its complete object elements
+
+    Each chunk is scanned once and only the element still being streamed is kept,
+    so the cost stays linear in the length of the response.
+    """
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        # Pieces of the element being streamed, None between elements
+        self._pieces: Optional[List[str]] = None
+        self._active = True
+
+    def abandon(self) -> None:
+        """Stop scanning, e.g. once the response turns out not to be an array of components"""
+        self._active = False
+        self._pieces = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Scan the next chunk of the response
+
+        Args:
+            chunk: Text received since the previous call
+
+        Returns:
+            JSON texts of the array elements completed by this chunk
+        """
+        if not self._active:
+            return []
+        elements = []
+        # Where the current element starts in this chunk; 0 if it began in an earlier one
+        element_start = None if self._pieces is None else 0
+        for index, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if self._depth == 0 and char != "[":
+                    self.abandon()
+                    return elements
+                if self._depth == 1:
+                    element_start = index
+                    self._pieces = []
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 1 and self._pieces is not None:
+                    self._pieces.append(chunk[element_start:index + 1])
+                    elements.append("".join(self._pieces))
+                    self._pieces = None
+                    element_start = None
+            elif not char.isspace() and self._depth <= 1 and not (self._depth == 1 and char == ","):
+                # Text outside the array or a bare value in it - not a list of components
+                self.abandon()
+                return elements
+
+        if self._pieces is not None:
+            self._pieces.append(chunk[element_start:])
+        return elements
+
+_FEE_PATTERN = re.compile("fee", re.IGNORECASE)
+
+def _aggregate_transactions(transactions: Sequence[Transaction]) -> Tuple[float, float, int, Dict[str, float], bool]:
+    """
+    Aggregate a transaction history in a single pass
+
+    Args:
+        transactions: Transaction history
+
+    Returns:
+        Tuple of (total spending as a negative sum, total income, number of debits,
+        spending per category, whether any fee was charged)
+    """
+    total_spending = 0.0
+    total_income = 0.0
+    debit_count = 0
+    spending_by_category = {}
+    for transaction in transactions:
+        amount = transaction.amount
+        if amount < 0:
+            total_spending += amount
+            debit_count += 1
+            category = transaction.category
+            spending_by_category[category] = spending_by_category.get(category, 0) - amount
+        elif amount > 0:
+            total_income += amount
+
+    # One case-insensitive scan over all descriptions instead of lowercasing each one
+    recent_fees = _FEE_PATTERN.search("\n".join(t.description for t in transactions)) is not None
+    return total_spending, total_income, debit_count, spending_by_category, recent_fees
+
+# Behavior analyses by customer id, most recently used last
+BEHAVIOR_CACHE_SIZE = 10_000
+BEHAVIOR_CACHE_TTL_SECONDS = 300
+_behavior_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+def invalidate_customer_behavior(customer_id: Optional[str] = None) -> None:
+    """Drop the cached behavior analysis of a customer (of every customer if None), e.g. after a new transaction"""
+    if customer_id is None:
+        _behavior_cache.clear()
+    else:
+        _behavior_cache.pop(customer_id, None)
+
 def analyze_customer_behavior(customer_id: str) -> Dict[str, Any]:
     """
     Analyze customer behavior patterns
 
+    Results are cached per customer for BEHAVIOR_CACHE_TTL_SECONDS; each call
+    returns its own copy, so callers may mutate it freely.
+
     Args:
         customer_id: The customer's unique identifier
 
     Returns:
         Dictionary with behavior analysis
     """
+    entry = _behavior_cache.get(customer_id)
+    if entry is not None:
+        expires_at, behavior = entry
+        if expires_at >= time.monotonic():
+            _behavior_cache.move_to_end(customer_id)
+            return copy.deepcopy(behavior)
+        del _behavior_cache[customer_id]
+
     customer_profile = get_customer_data(customer_id)
     if not customer_profile:
         return {"error": "Customer not found"}
 
-    # Analyze spending patterns
-    total_spending = sum(t["amount"] for t in customer_profile.recent_transactions if t["amount"] < 0)
-    total_income = sum(t["amount"] for t in customer_profile.recent_transactions if t["amount"] > 0)
+    behavior = _analyze_profile(customer_id, customer_profile)
+    _behavior_cache[customer_id] = (time.monotonic() + BEHAVIOR_CACHE_TTL_SECONDS, behavior)
+    while len(_behavior_cache) > BEHAVIOR_CACHE_SIZE:
+        _behavior_cache.popitem(last=False)
+    return copy.deepcopy(behavior)
 
-    # Categorize spending
-    spending_by_category = {}
-    for transaction in customer_profile.recent_transactions:
-        if transaction["amount"] < 0:
-            category = transaction["category"]
-            spending_by_category[category] = spending_by_category.get(category, 0) + abs(transaction["amount"])
+def _analyze_profile(customer_id: str, customer_profile: CustomerProfile) -> Dict[str, Any]:
+    """Compute the behavior analysis of a customer profile"""
+    total_spending, total_income, debit_count, spending_by_category, recent_fees = _aggregate_transactions(
+        customer_profile.recent_transactions
+    )
 
     return {
         "customer_id": customer_id,
@@ -260,10 +522,10 @@ def analyze_customer_behavior(customer_id: str) -> Dict[str, Any]:
         "total_income_5_days": total_income,
         "net_cash_flow": total_income + total_spending,
         "spending_by_category": spending_by_category,
-        "average_transaction": abs(total_spending) / len([t for t in customer_profile.recent_transactions if t["amount"] < 0]),
+        "average_transaction": abs(total_spending) / debit_count if debit_count else 0.0,
         "risk_indicators": {
             "low_balance": customer_profile.account_balance < 500,
-            "recent_fees": any("fee" in t["description"].lower() for t in customer_profile.recent_transactions),
+            "recent_fees": recent_fees,
             "high_spending": abs(total_spending) > customer_profile.account_balance * 0.5
         }
     }
@@ -1,13 +1,12 @@
 """
 Next Message Agent - Suggests next replies using knowledge base
 """
-import os
-from typing import List, Dict, Any, Optional
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Union, FrozenSet, Tuple
 import dotenv
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.models.nebius import Nebius
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 import agent_config
 
 dotenv.load_dotenv()
@@ -98,6 +97,20 @@ Guidelines:
 Your suggestions should help agents provide consistent, high-quality support.
 """
 
+# Keyword -> article ids, built once from the knowledge base keys (e.g. "card_issues" -> card, issues)
+_KEYWORD_INDEX: Dict[str, List[str]] = {}
+for _article_id in BANKING_KNOWLEDGE_BASE:
+    for _keyword in _article_id.split('_'):
+        _KEYWORD_INDEX.setdefault(_keyword, []).append(_article_id)
+
+# Single pass over the text for every keyword; longest first so a keyword is never cut short by its prefix
+_KEYWORD_PATTERN = re.compile(
+    "|".join(map(re.escape, sorted(_KEYWORD_INDEX, key=len, reverse=True))),
+    re.IGNORECASE
+)
+
+_ARTICLE_ORDER = {article_id: i for i, article_id in enumerate(BANKING_KNOWLEDGE_BASE)}
+
 def get_relevant_knowledge(customer_message: str, conversation_context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Get relevant knowledge base articles based on customer message and context
@@ -110,24 +123,41 @@ def get_relevant_knowledge(customer_message: str, conversation_context: List[Dic
         List of relevant knowledge base articles
     """
     # Simple keyword matching - in production this would use vector similarity
-    relevant_articles = []
+    texts = [customer_message]
+    texts.extend(msg.get('content', '') for msg in conversation_context[-3:])  # Look at last 3 messages for context
 
-    combined_text = customer_message.lower()
-    for msg in conversation_context[-3:]:  # Look at last 3 messages for context
-        combined_text += " " + msg.get('content', '').lower()
+    matched_keywords = frozenset(
+        keyword.lower() for text in texts for keyword in _KEYWORD_PATTERN.findall(text)
+    )
+    # Hand out fresh records so callers can't corrupt the cached ones
+    return [
+        {**article, "escalation_triggers": list(article["escalation_triggers"])}
+        for article in _articles_for_keywords(matched_keywords)
+    ]
 
-    for key, article in BANKING_KNOWLEDGE_BASE.items():
-        # Check if any keywords match
-        keywords = key.replace('_', ' ').split()
-        if any(keyword in combined_text for keyword in keywords):
-            relevant_articles.append({
-                "id": key,
-                "title": article["title"],
-                "content": article["content"],
-                "escalation_triggers": article["escalation_triggers"]
-            })
+@lru_cache(maxsize=256)
+def _articles_for_keywords(keywords: FrozenSet[str]) -> Tuple[Dict[str, Any], ...]:
+    """Resolve matched keywords to knowledge base articles, cached since turns of a conversation repeat topics"""
+    matched_ids = {article_id for keyword in keywords for article_id in _KEYWORD_INDEX[keyword]}
+
+    relevant_articles = []
+    for key in sorted(matched_ids, key=_ARTICLE_ORDER.__getitem__):
+        article = BANKING_KNOWLEDGE_BASE[key]
+        relevant_articles.append({
+            "id": key,
+            "title": article["title"],
+            "content": article["content"],
+            "escalation_triggers": tuple(article["escalation_triggers"])
+        })
 
-    return relevant_articles
+    return tuple(relevant_articles)
+
+# Invariant opening of every suggestion prompt
+NEXT_MESSAGE_PROMPT_PREFIX = (
+    "Based on the following conversation and knowledge base, "
+    "suggest the best next response for the customer support agent.\n\n"
+    "Conversation History:\n"
+)
 
 def create_next_message_agent() -> Agent:
     """Create and return the next message agent"""
@@ -135,82 +165,57 @@ def create_next_message_agent() -> Agent:
         name="NextMessageAgent",
         model=agent_config.get_model(),
         description=NEXT_MESSAGE_SYSTEM_PROMPT,
-        add_history_to_context=True,
+        output_schema=NextMessageSuggestion,
+        use_json_mode=True,
+        add_history_to_context=False,
     )
 
-def suggest_next_message(
+def _build_next_message_prompt(
     customer_message: str,
     conversation_history: List[Dict[str, Any]],
     customer_context: Optional[Dict[str, Any]] = None
-) -> NextMessageSuggestion:
-    """
-    Suggest the next message for a customer support agent
-
-    Args:
-        customer_message: The latest message from the customer
-        conversation_history: Previous messages in the conversation
-        customer_context: Additional context about the customer (account info, etc.)
-
-    Returns:
-        NextMessageSuggestion with recommended response
-    """
-    agent = create_next_message_agent()
-
+) -> str:
+    """Build the suggestion prompt from the conversation and knowledge base"""
     # Get relevant knowledge base articles
     relevant_knowledge = get_relevant_knowledge(customer_message, conversation_history)
 
     # Format conversation history
-    formatted_history = ""
-    for i, msg in enumerate(conversation_history[-5:], 1):  # Last 5 messages for context
-        role = msg.get('role', 'unknown')
-        content = msg.get('content', '')
-        formatted_history += f"{role.title()}: {content}\n"
+    formatted_history = "".join(
+        f"{msg.get('role', 'unknown').title()}: {msg.get('content', '')}\n"
+        for msg in conversation_history[-5:]  # Last 5 messages for context
+    )
 
     # Format knowledge base articles
     knowledge_context = ""
     if relevant_knowledge:
-        knowledge_context = "\n\nRelevant Knowledge Base Articles:\n"
-        for article in relevant_knowledge:
-            knowledge_context += f"\n{article['title']}:\n{article['content']}\n"
-            knowledge_context += f"Escalation triggers: {', '.join(article['escalation_triggers'])}\n"
+        knowledge_context = "\n\nRelevant Knowledge Base Articles:\n" + "".join(
+            f"\n{article['title']}:\n{article['content']}\n"
+            f"Escalation triggers: {', '.join(article['escalation_triggers'])}\n"
+            for article in relevant_knowledge
+        )
 
     # Format customer context if available
     customer_info = ""
     if customer_context:
         customer_info = f"\nCustomer Context: {customer_context}\n"
 
-    prompt = f"""
-    Based on the following conversation and knowledge base, suggest the best next response for the customer support agent.
-
-    Conversation History:
-    {formatted_history}
-
-    Latest Customer Message: {customer_message}
-    {customer_info}
-    {knowledge_context}
-
-    Please provide your suggestion in the following JSON format:
-    {{
-        "suggested_message": "Your suggested response to the customer",
-        "confidence_level": "high/medium/low",
-        "reasoning": "Why this is the best response",
-        "alternative_approaches": ["alternative1", "alternative2"],
-        "requires_escalation": true/false,
-        "knowledge_sources_used": ["source1", "source2"]
-    }}
-    """
-
-    response = agent.run(prompt)
+    return (
+        f"{NEXT_MESSAGE_PROMPT_PREFIX}{formatted_history}\n"
+        f"Latest Customer Message: {customer_message}\n"
+        f"{customer_info}{knowledge_context}"
+    )
 
-    # Parse the response
+def _parse_suggestion(content: Union[NextMessageSuggestion, str]) -> NextMessageSuggestion:
+    """Return the structured suggestion, validating raw JSON if the model output wasn't parsed"""
+    if isinstance(content, NextMessageSuggestion):
+        # The run output may be a cached one shared with other callers
+        return content.model_copy(deep=True)
     try:
-        import json
-        suggestion_data = json.loads(response.content)
-        return NextMessageSuggestion(**suggestion_data)
-    except (json.JSONDecodeError, Exception) as e:
+        return NextMessageSuggestion.model_validate_json(content)
+    except ValidationError:
         # Fallback if JSON parsing fails
         return NextMessageSuggestion(
-            suggested_message=response.content[:300] + "..." if len(response.content) > 300 else response.content,
+            suggested_message=content[:300] + "..." if len(content) > 300 else content,
             confidence_level="medium",
             reasoning="Generated response based on conversation context",
             alternative_approaches=["Escalate to human agent", "Request additional information"],
@@ -218,6 +223,52 @@ def suggest_next_message(
             knowledge_sources_used=["general_guidelines"]
         )
 
+def suggest_next_message(
+    customer_message: str,
+    conversation_history: List[Dict[str, Any]],
+    customer_context: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
+) -> NextMessageSuggestion:
+    """
+    Suggest the next message for a customer support agent
+
+    Args:
+        customer_message: The latest message from the customer
+        conversation_history: Previous messages in the conversation
+        customer_context: Additional context about the customer (account info, etc.)
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Returns:
+        NextMessageSuggestion with recommended response
+    """
+    agent = agent_config.get_agent(create_next_message_agent)
+    prompt = _build_next_message_prompt(customer_message, conversation_history, customer_context)
+    response = agent_config.cached_run(agent, prompt, "next_message", session_id)
+    return _parse_suggestion(response.content)
+
+async def suggest_next_message_async(
+    customer_message: str,
+    conversation_history: List[Dict[str, Any]],
+    customer_context: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
+) -> NextMessageSuggestion:
+    """
+    Async variant of suggest_next_message, so it can run alongside other agents
+
+    Args:
+        customer_message: The latest message from the customer
+        conversation_history: Previous messages in the conversation
+        customer_context: Additional context about the customer (account info, etc.)
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Returns:
+        NextMessageSuggestion with recommended response
+    """
+    agent = agent_config.get_agent(create_next_message_agent)
+    prompt = _build_next_message_prompt(customer_message, conversation_history, customer_context)
+    response = await agent_config.acached_run(agent, prompt, "next_message", session_id)
+    return _parse_suggestion(response.content)
+
 # Example usage for testing
 if __name__ == "__main__":
     conversation_history = [
@@ -0,0 +1,62 @@
+"""
+Agent Pipeline - Runs the specialized agents for a customer turn concurrently
+"""
+import asyncio
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel
+
+from .summary_agent import summarize_conversation_async, MessageSummary
+from .next_message_agent import suggest_next_message_async, NextMessageSuggestion
+from .customer_explorer_agent import explore_customer_context_async, RichExperience
+
+class PipelineResult(BaseModel):
+    """Combined output of the specialized agents for one customer turn"""
+    summary: MessageSummary
+    suggestion: NextMessageSuggestion
+    rich_experiences: List[RichExperience]
+
+async def run_pipeline_async(
+    messages: List[Dict[str, Any]],
+    customer_message: str,
+    customer_id: str,
+    customer_context: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
+) -> PipelineResult:
+    """
+    Run the summary, next message and customer explorer agents concurrently
+
+    The three agents don't depend on each other, so their LLM calls are
+    issued together and the turn takes as long as the slowest one.
+
+    Args:
+        messages: Conversation so far, as message objects with 'role', 'content', and 'timestamp'
+        customer_message: The latest message from the customer
+        customer_id: The customer's unique identifier
+        customer_context: Additional context about the customer (account info, etc.)
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Returns:
+        PipelineResult with the output of every agent
+    """
+    summary, suggestion, rich_experiences = await asyncio.gather(
+        summarize_conversation_async(messages, session_id),
+        suggest_next_message_async(customer_message, messages, customer_context, session_id),
+        explore_customer_context_async(customer_id, customer_message, messages, session_id),
+    )
+    return PipelineResult(
+        summary=summary,
+        suggestion=suggestion,
+        rich_experiences=rich_experiences
+    )
+
+def run_pipeline(
+    messages: List[Dict[str, Any]],
+    customer_message: str,
+    customer_id: str,
+    customer_context: Optional[Dict[str, Any]] = None,
+    session_id: Optional[str] = None
+) -> PipelineResult:
+    """Synchronous entrypoint for run_pipeline_async, for callers without an event loop"""
+    return asyncio.run(
+        run_pipeline_async(messages, customer_message, customer_id, customer_context, session_id)
+    )
@@ -1,13 +1,10 @@
 """
 Summary Agent - Takes message threads and summarizes them with sentiment analysis
 """
-import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 import dotenv
 from agno.agent import Agent
-from agno.models.openai import OpenAIChat
-from agno.models.nebius import Nebius
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 import agent_config
 
 dotenv.load_dotenv()
@@ -44,62 +41,42 @@ Guidelines:
 Always respond with a structured summary that helps support agents understand the context quickly.
 """
 
+# Static part of the per-request prompt, built once at import
+SUMMARY_PROMPT_PREFIX = "Please analyze the following customer support conversation and provide a comprehensive summary:\n\n"
+
 def create_summary_agent() -> Agent:
     """Create and return the summary agent"""
     return Agent(
         name="SummaryAgent",
         model=agent_config.get_model(),
         description=SUMMARY_SYSTEM_PROMPT,
-        add_history_to_context=True,
+        output_schema=MessageSummary,
+        use_json_mode=True,
+        add_history_to_context=False,
     )
 
-def summarize_conversation(messages: List[Dict[str, Any]]) -> MessageSummary:
-    """
-    Summarize a conversation thread with sentiment analysis
-
-    Args:
-        messages: List of message objects with 'role', 'content', and 'timestamp'
-
-    Returns:
-        MessageSummary object with comprehensive analysis
-    """
-    agent = create_summary_agent()
-
+def _build_summary_prompt(messages: List[Dict[str, Any]]) -> str:
+    """Build the analysis prompt for a conversation thread"""
     # Format messages for analysis
-    formatted_conversation = ""
-    for i, msg in enumerate(messages, 1):
-        role = msg.get('role', 'unknown')
-        content = msg.get('content', '')
-        timestamp = msg.get('timestamp', 'unknown time')
-        formatted_conversation += f"Message {i} ({role} at {timestamp}):\n{content}\n\n"
-
-    prompt = f"""
-    Please analyze the following customer support conversation and provide a comprehensive summary:
-
-    {formatted_conversation}
-
-    Provide your analysis in the following JSON format:
-    {{
-        "summary": "Brief overview of the conversation",
-        "sentiment": "positive/negative/neutral",
-        "key_issues": ["issue1", "issue2", ...],
-        "customer_satisfaction_level": "high/medium/low",
-        "urgency_level": "high/medium/low",
-        "suggested_actions": ["action1", "action2", ...]
-    }}
-    """
+    formatted_conversation = "".join(
+        f"Message {i} ({msg.get('role', 'unknown')} at {msg.get('timestamp', 'unknown time')}):\n"
+        f"{msg.get('content', '')}\n\n"
+        for i, msg in enumerate(messages, 1)
+    )
 
-    response = agent.run(prompt)
+    return SUMMARY_PROMPT_PREFIX + formatted_conversation
 
-    # Parse the response and create MessageSummary
+def _parse_summary(content: Union[MessageSummary, str]) -> MessageSummary:
+    """Return the structured summary, validating raw JSON if the model output wasn't parsed"""
+    if isinstance(content, MessageSummary):
+        # The run output may be a cached one shared with other callers
+        return content.model_copy(deep=True)
     try:
-        import json
-        summary_data = json.loads(response.content)
-        return MessageSummary(**summary_data)
-    except (json.JSONDecodeError, Exception) as e:
+        return MessageSummary.model_validate_json(content)
+    except ValidationError:
         # Fallback if JSON parsing fails
         return MessageSummary(
-            summary=response.content[:200] + "..." if len(response.content) > 200 else response.content,
+            summary=content[:200] + "..." if len(content) > 200 else content,
             sentiment="neutral",
             key_issues=["Analysis parsing error"],
             customer_satisfaction_level="medium",
@@ -107,6 +84,41 @@ def summarize_conversation(messages: List[Dict[str, Any]]) -> MessageSummary:
             suggested_actions=["Manual review required"]
         )
 
+def summarize_conversation(messages: List[Dict[str, Any]], session_id: Optional[str] = None) -> MessageSummary:
+    """
+    Summarize a conversation thread with sentiment analysis
+
+    Args:
+        messages: List of message objects with 'role', 'content', and 'timestamp'
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Returns:
+        MessageSummary object with comprehensive analysis
+    """
+    agent = agent_config.get_agent(create_summary_agent)
+    prompt = _build_summary_prompt(messages)
+    response = agent_config.cached_run(agent, prompt, "summary", session_id)
+    return _parse_summary(response.content)
+
+async def summarize_conversation_async(
+    messages: List[Dict[str, Any]],
+    session_id: Optional[str] = None
+) -> MessageSummary:
+    """
+    Async variant of summarize_conversation, so it can run alongside other agents
+
+    Args:
+        messages: List of message objects with 'role', 'content', and 'timestamp'
+        session_id: Conversation identifier, so concurrent conversations don't share agent state
+
+    Returns:
+        MessageSummary object with comprehensive analysis
+    """
+    agent = agent_config.get_agent(create_summary_agent)
+    prompt = _build_summary_prompt(messages)
+    response = await agent_config.acached_run(agent, prompt, "summary", session_id)
+    return _parse_summary(response.content)
+
 # Example usage for testing
 if __name__ == "__main__":
     sample_messages = [
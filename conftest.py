@@ -0,0 +1,195 @@
+"""
+Shared pytest configuration for the agent test suites
+"""
+import asyncio
+import hashlib
+import os
+
+import dotenv
+import pytest
+import pytest_asyncio
+
+# Code an agent test exercises besides its own file; a change to any of it re-runs the test
+AGENT_SOURCES = ("agent_config.py", "main_support_agent*.py", "agents/*.py")
+PASSED_CACHE_KEY = "agent_tests/passed"
+# Scenario cache key used with SCENARIO_REPLAY=1 when --scenario-cache-key isn't given
+REPLAY_CACHE_KEY = "replay"
+
+# Scenarios in flight at once per test module, kept within the judge/user simulator rate limits
+SCENARIO_CONCURRENCY = 8
+
+_source_digests = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-agent",
+        action="store_true",
+        default=False,
+        help="Run the LLM-driven tests marked agent_test (skipped by default)",
+    )
+    parser.addoption(
+        "--skip-unchanged",
+        action="store_true",
+        default=False,
+        help=(
+            "With --run-agent, skip agent tests that passed on an earlier run "
+            "and whose test file and agent code are unchanged since"
+        ),
+    )
+    parser.addoption(
+        "--scenario-timeout-s",
+        type=float,
+        default=float(os.getenv("SCENARIO_TIMEOUT_S", "300")),
+        help="Fail a scenario that hasn't finished after this many seconds (0 disables the limit)",
+    )
+    parser.addoption(
+        "--scenario-cache-key",
+        default=os.getenv("SCENARIO_CACHE_KEY", ""),
+        help=(
+            "Cache Scenario's user simulator and judge LLM calls on disk under this key, "
+            "so reruns with unchanged conversations skip the network. Change the key to "
+            "bust the cache; empty (default) disables caching, unless SCENARIO_REPLAY=1. "
+            "Env: SCENARIO_CACHE_KEY"
+        ),
+    )
+
+
+def pytest_configure(config):
+    # Loaded once per session, before collection, since test modules read the environment at import
+    dotenv.load_dotenv()
+
+    config.addinivalue_line(
+        "markers", "agent_test: LLM-driven scenario test, only run with --run-agent"
+    )
+
+    cache_key = config.getoption("--scenario-cache-key")
+    if not cache_key and os.getenv("SCENARIO_REPLAY") == "1":
+        # Agent replies are being replayed, so replay the user simulator and judge too:
+        # a recorded conversation then reruns without any network calls
+        cache_key = REPLAY_CACHE_KEY
+    if cache_key:
+        import scenario
+
+        scenario.configure(cache_key=cache_key)
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Run the async tests on uvloop where it is installed (it isn't on Windows)"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def scenario_default_model(request):
+    """
+    Point Scenario at the test module's SCENARIO_MODEL while its tests run.
+
+    scenario.configure() is process-wide, so calling it at module import let
+    the last collected module pick the model for every suite.
+    """
+    model = getattr(request.module, "SCENARIO_MODEL", None)
+    if model:
+        import scenario
+
+        scenario.configure(default_model=model)
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def scenario_results(request, scenario_default_model):
+    """
+    Start every selected scenario of the test module at once.
+
+    A scenario run is dominated by LLM round trips, so instead of running them
+    one test at a time, the module's scenarios are started together (up to
+    SCENARIO_CONCURRENCY in flight) and each test awaits its own task, keyed by
+    spec id. Test modules parametrize over ScenarioSpecs and provide run_scenario().
+
+    A scenario still running after --scenario-timeout-s is cancelled, and its
+    test fails with TimeoutError instead of spending more LLM calls.
+    """
+    semaphore = asyncio.Semaphore(SCENARIO_CONCURRENCY)
+    timeout = request.config.getoption("--scenario-timeout-s") or None
+
+    async def run(spec):
+        async with semaphore:
+            return await asyncio.wait_for(request.module.run_scenario(spec), timeout)
+
+    specs = [
+        item.callspec.params["spec"]
+        for item in request.session.items
+        if getattr(item, "module", None) is request.module
+        and hasattr(item, "callspec")
+        and not item.get_closest_marker("skip")
+    ]
+    tasks = {spec.id: asyncio.create_task(run(spec)) for spec in specs}
+    yield tasks
+    for task in tasks.values():
+        task.cancel()
+    # Let the cancellations finish before the module loop closes
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+
+def _tracks_passes(config):
+    """Whether passing agent tests are recorded and skipped: --skip-unchanged with pytest's cache enabled"""
+    return (
+        config.getoption("--run-agent")
+        and config.getoption("--skip-unchanged")
+        and hasattr(config, "cache")
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-agent"):
+        if _tracks_passes(config):
+            _skip_unchanged(config, items)
+        return
+    skip_agent = pytest.mark.skip(reason="LLM-driven agent test, pass --run-agent to run it")
+    for item in items:
+        if "agent_test" in item.keywords:
+            item.add_marker(skip_agent)
+
+
+def _source_digest(config, test_path):
+    """
+    Digest of the agent code plus the test file, memoized per test file.
+
+    The replay and scenario cache-key modes are part of it, so a pass against
+    replayed or cached LLM calls doesn't count for a live run.
+    """
+    if test_path not in _source_digests:
+        root = config.rootpath
+        paths = sorted({path for pattern in AGENT_SOURCES for path in root.glob(pattern)})
+        digest = hashlib.blake2b(digest_size=16)
+        mode = f"replay={os.getenv('SCENARIO_REPLAY') == '1'} cache_key={config.getoption('--scenario-cache-key')}"
+        digest.update(mode.encode())
+        for path in [*paths, test_path]:
+            digest.update(path.read_bytes())
+        _source_digests[test_path] = digest.hexdigest()
+    return _source_digests[test_path]
+
+
+def _skip_unchanged(config, items):
+    passed = config.cache.get(PASSED_CACHE_KEY, {})
+    skip_unchanged = pytest.mark.skip(reason="passed before, agent code and test unchanged")
+    for item in items:
+        if "agent_test" in item.keywords and passed.get(item.nodeid) == _source_digest(config, item.path):
+            item.add_marker(skip_unchanged)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Remember which agent tests passed against which version of the agent code"""
+    report = yield
+    if report.when == "call" and "agent_test" in item.keywords and _tracks_passes(item.config):
+        passed = item.config.cache.get(PASSED_CACHE_KEY, {})
+        if report.passed:
+            passed[item.nodeid] = _source_digest(item.config, item.path)
+        else:
+            passed.pop(item.nodeid, None)
+        item.config.cache.set(PASSED_CACHE_KEY, passed)
+    return report
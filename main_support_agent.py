@@ -5,13 +5,17 @@ This is the production code - kept very simple. One agent with tools, Agno handl
 """
 
 import os
-import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 import dotenv
+from pydantic_core import to_json
 from agno.agent import Agent
+from agno.db.in_memory import InMemoryDb
+from agno.run.agent import RunContentEvent
 from agno.models.openai import OpenAIChat
 from agno.models.nebius import Nebius
 
+import agent_config
+
 # Import our specialized agents as tools
 from agents.summary_agent import summarize_conversation
 from agents.next_message_agent import suggest_next_message
@@ -20,10 +24,7 @@ from agents.customer_explorer_agent import (
     analyze_customer_behavior,
 )
 
-import langwatch
-from openinference.instrumentation.agno import AgnoInstrumentor
-
-langwatch.setup(instrumentors=[AgnoInstrumentor()])
+agent_config.setup_tracing()
 
 dotenv.load_dotenv()
 
@@ -67,6 +68,44 @@ Remember: Tool usage is not optional when the situation matches the requirements
 """
 
 
+def _dumps(value: Any) -> str:
+    """Encode a tool reply as compact JSON text (pydantic-core's Rust encoder)"""
+    return to_json(value).decode()
+
+
+# Tool replies are mostly constant, so their JSON is encoded once at import
+# and only the caller-supplied fields are encoded per call.
+def _json_tail(fields: Dict[str, Any]) -> str:
+    """Encode fields as the trailing members of a JSON object: ',"k":v,...}'"""
+    return "," + _dumps(fields)[1:]
+
+
+_CONVERSATION_SUMMARY_JSON = _dumps(
+    {
+        "summary": "Conversation analysis requested",
+        "sentiment": "neutral",
+        "key_issues": ["general inquiry"],
+        "suggested_actions": ["continue conversation"],
+    }
+)
+
+_SUGGESTION_TAIL = _json_tail(
+    {
+        "confidence": "medium",
+        "knowledge_sources": ["general_banking_guide"],
+        "alternatives": ["Ask for more details", "Escalate to specialist"],
+    }
+)
+
+_ESCALATION_MESSAGE = "I'm connecting you with a specialist who can provide additional assistance."
+_ESCALATION_TAIL_HIGH = _json_tail(
+    {"estimated_wait": "5-10 minutes", "message": _ESCALATION_MESSAGE}
+)
+_ESCALATION_TAIL_DEFAULT = _json_tail(
+    {"estimated_wait": "10-15 minutes", "message": _ESCALATION_MESSAGE}
+)
+
+
 def get_conversation_summary(conversation_context: str = "recent messages") -> str:
     """
     Analyze the conversation for patterns, sentiment, and key issues
@@ -77,19 +116,10 @@ def get_conversation_summary(conversation_context: str = "recent messages") -> s
     Returns:
         JSON string with conversation analysis
     """
-    langwatch.get_current_trace().update(
-        metadata={"labels": ["tool_get_conversation_summary"]}
-    )
+    agent_config.add_trace_label("tool_get_conversation_summary")
     # In a real implementation, this would get the actual conversation history
     # For now, we'll simulate with a basic response
-    return json.dumps(
-        {
-            "summary": "Conversation analysis requested",
-            "sentiment": "neutral",
-            "key_issues": ["general inquiry"],
-            "suggested_actions": ["continue conversation"],
-        }
-    )
+    return _CONVERSATION_SUMMARY_JSON
 
 
 def get_message_suggestion(customer_query: str, context: str = "") -> str:
@@ -103,17 +133,10 @@ def get_message_suggestion(customer_query: str, context: str = "") -> str:
     Returns:
         JSON string with response suggestions
     """
-    langwatch.get_current_trace().update(
-        metadata={"labels": ["tool_get_message_suggestion"]}
-    )
+    agent_config.add_trace_label("tool_get_message_suggestion")
     # Simulate knowledge base lookup
-    suggestion_data = {
-        "suggested_response": f"I understand your concern about: {customer_query}. Let me help you with that.",
-        "confidence": "medium",
-        "knowledge_sources": ["general_banking_guide"],
-        "alternatives": ["Ask for more details", "Escalate to specialist"],
-    }
-    return json.dumps(suggestion_data)
+    suggested_response = f"I understand your concern about: {customer_query}. Let me help you with that."
+    return '{"suggested_response":' + _dumps(suggested_response) + _SUGGESTION_TAIL
 
 
 def explore_customer_account(customer_id: str, query: str) -> str:
@@ -133,14 +156,13 @@ def explore_customer_account(customer_id: str, query: str) -> str:
     # Get rich experiences based on query
     rich_experiences = explore_customer_context(customer_id, query)
 
-    langwatch.get_current_trace().update(
-        metadata={"labels": ["tool_explore_customer_account"]}
-    )
+    agent_config.add_trace_label("tool_explore_customer_account")
 
-    return json.dumps(
+    # to_json consumes the generator directly, without building an intermediate list
+    return _dumps(
         {
             "customer_behavior": behavior,
-            "rich_experiences": [
+            "rich_experiences": (
                 {
                     "type": exp.component_type,
                     "title": exp.title,
@@ -149,7 +171,7 @@ def explore_customer_account(customer_id: str, query: str) -> str:
                     "priority": exp.priority,
                 }
                 for exp in rich_experiences
-            ],
+            ),
         }
     )
 
@@ -165,16 +187,18 @@ def escalate_to_human(reason: str, urgency: str = "medium") -> str:
     Returns:
         JSON string with escalation details
     """
-    langwatch.get_current_trace().update(metadata={"labels": ["escalation"]})
-
-    escalation_data = {
-        "escalated": True,
-        "reason": reason,
-        "urgency": urgency,
-        "estimated_wait": "5-10 minutes" if urgency == "high" else "10-15 minutes",
-        "message": "I'm connecting you with a specialist who can provide additional assistance.",
-    }
-    return json.dumps(escalation_data)
+    agent_config.add_trace_label("escalation")
+
+    tail = _ESCALATION_TAIL_HIGH if urgency == "high" else _ESCALATION_TAIL_DEFAULT
+    return (
+        '{"escalated":true,"reason":' + _dumps(reason)
+        + ',"urgency":' + _dumps(urgency) + tail
+    )
+
+
+# Sessions live in a store, so conversations run under different session_ids
+# (e.g. concurrent demo scenarios) each keep their own history
+support_db = InMemoryDb()
 
 
 # Create the main support agent
@@ -195,6 +219,7 @@ support_agent = Agent(
         escalate_to_human,
     ],
     description=SYSTEM_PROMPT,
+    db=support_db,
     add_history_to_context=True,  # Let Agno handle memory
 )
 
@@ -202,10 +227,19 @@ support_agent = Agent(
 # Simple interface for testing
 def chat_with_agent(message: str) -> str:
     """Simple interface to chat with the agent"""
-    response = support_agent.run(message)
+    with agent_config.batch_trace_labels():
+        response = support_agent.run(message)
     return response.content
 
 
+def stream_chat_with_agent(message: str) -> Iterator[str]:
+    """Stream the agent's reply, yielding text chunks as the model produces them"""
+    with agent_config.batch_trace_labels():
+        for event in support_agent.run(message, stream=True):
+            if isinstance(event, RunContentEvent) and event.content:
+                yield event.content
+
+
 # Example usage
 if __name__ == "__main__":
     print("=== Bank Customer Support Agent ===")
@@ -217,14 +251,18 @@ if __name__ == "__main__":
     customer_message = "Hi, I'm seeing some transactions on my account that I don't recognize. I'm worried about fraud."
     print(f"\nCustomer: {customer_message}")
 
-    response = chat_with_agent(customer_message)
-    print(f"Agent: {response}")
+    print("Agent: ", end="", flush=True)
+    for chunk in stream_chat_with_agent(customer_message):
+        print(chunk, end="", flush=True)
+    print()
 
     # Continue conversation
     customer_message2 = "Yes, there's an $85 charge from Amazon and a $45 gas station charge. Can you help me freeze my card?"
     print(f"\nCustomer: {customer_message2}")
 
-    response2 = chat_with_agent(customer_message2)
-    print(f"Agent: {response2}")
+    print("Agent: ", end="", flush=True)
+    for chunk in stream_chat_with_agent(customer_message2):
+        print(chunk, end="", flush=True)
+    print()
 
     print("\n=== Conversation Complete ===")
@@ -1,21 +1,57 @@
 """
-Main Bank Customer Support Agent - Claude Sonnet 4.5 Model
+Main Bank Customer Support Agent - Claude Haiku 4.5, escalating to Opus 4.6
 
 This is the production code - kept very simple. One agent with tools, Agno handles memory.
 """
 
 import os
-import json
-from typing import Dict, Any
+import re
+from uuid import uuid4
+from typing import Dict, Any, Iterator
 import dotenv
+import httpx
+import anthropic
+from pydantic_core import to_json
 from agno.agent import Agent
+from agno.db.in_memory import InMemoryDb
+from agno.run.agent import RunContentEvent
 from agno.models.anthropic import Claude
 
 import agent_config
 
 dotenv.load_dotenv()
 
-agent_config.set_model(Claude(id="claude-opus-4-6", api_key=os.getenv("ANTHROPIC_API_KEY")))
+# Haiku answers most turns; Opus is kept for the ones that need multi-step reasoning.
+# Chat replies are capped at SUPPORT_MAX_TOKENS to bound worst-case generation time.
+SUPPORT_MAX_TOKENS = 1024
+
+# All Claude models in this module share one pooled Anthropic client, so
+# concurrent runs reuse keep-alive connections instead of opening their own.
+# Async runs keep Agno's own client: an async connection pool is bound to the
+# event loop that opened it and can't be shared across asyncio.run() calls.
+anthropic_client = anthropic.Anthropic(
+    api_key=os.getenv("ANTHROPIC_API_KEY"),
+    http_client=httpx.Client(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    ),
+)
+
+haiku_model = Claude(
+    id="claude-haiku-4-5",
+    client=anthropic_client,
+    max_tokens=SUPPORT_MAX_TOKENS,
+    temperature=0.2,
+)
+opus_model = Claude(
+    id="claude-opus-4-6",
+    client=anthropic_client,
+    max_tokens=SUPPORT_MAX_TOKENS,
+    temperature=0.2,
+)
+
+# Sub-agents return structured JSON whose size varies with the customer data,
+# so they keep the model's default output limit rather than the chat cap.
+agent_config.set_model(Claude(id="claude-haiku-4-5", client=anthropic_client))
 
 # Import our specialized agents as tools
 from agents.summary_agent import summarize_conversation
@@ -25,10 +61,7 @@ from agents.customer_explorer_agent import (
     analyze_customer_behavior,
 )
 
-import langwatch
-from openinference.instrumentation.agno import AgnoInstrumentor
-
-langwatch.setup(instrumentors=[AgnoInstrumentor()])
+agent_config.setup_tracing()
 
 SYSTEM_PROMPT = """
 You are a customer support agent for SecureBank, a modern digital banking platform.
@@ -70,6 +103,44 @@ Remember: Tool usage is not optional when the situation matches the requirements
 """
 
 
+def _dumps(value: Any) -> str:
+    """Encode a tool reply as compact JSON text (pydantic-core's Rust encoder)"""
+    return to_json(value).decode()
+
+
+# Tool replies are mostly constant, so their JSON is encoded once at import
+# and only the caller-supplied fields are encoded per call.
+def _json_tail(fields: Dict[str, Any]) -> str:
+    """Encode fields as the trailing members of a JSON object: ',"k":v,...}'"""
+    return "," + _dumps(fields)[1:]
+
+
+_CONVERSATION_SUMMARY_JSON = _dumps(
+    {
+        "summary": "Conversation analysis requested",
+        "sentiment": "neutral",
+        "key_issues": ["general inquiry"],
+        "suggested_actions": ["continue conversation"],
+    }
+)
+
+_SUGGESTION_TAIL = _json_tail(
+    {
+        "confidence": "medium",
+        "knowledge_sources": ["general_banking_guide"],
+        "alternatives": ["Ask for more details", "Escalate to specialist"],
+    }
+)
+
+_ESCALATION_MESSAGE = "I'm connecting you with a specialist who can provide additional assistance."
+_ESCALATION_TAIL_HIGH = _json_tail(
+    {"estimated_wait": "5-10 minutes", "message": _ESCALATION_MESSAGE}
+)
+_ESCALATION_TAIL_DEFAULT = _json_tail(
+    {"estimated_wait": "10-15 minutes", "message": _ESCALATION_MESSAGE}
+)
+
+
 def get_conversation_summary(conversation_context: str = "recent messages") -> str:
     """
     Analyze the conversation for patterns, sentiment, and key issues
@@ -80,19 +151,10 @@ def get_conversation_summary(conversation_context: str = "recent messages") -> s
     Returns:
         JSON string with conversation analysis
     """
-    langwatch.get_current_trace().update(
-        metadata={"labels": ["tool_get_conversation_summary"]}
-    )
+    agent_config.add_trace_label("tool_get_conversation_summary")
     # In a real implementation, this would get the actual conversation history
     # For now, we'll simulate with a basic response
-    return json.dumps(
-        {
-            "summary": "Conversation analysis requested",
-            "sentiment": "neutral",
-            "key_issues": ["general inquiry"],
-            "suggested_actions": ["continue conversation"],
-        }
-    )
+    return _CONVERSATION_SUMMARY_JSON
 
 
 def get_message_suggestion(customer_query: str, context: str = "") -> str:
@@ -106,17 +168,10 @@ def get_message_suggestion(customer_query: str, context: str = "") -> str:
     Returns:
         JSON string with response suggestions
     """
-    langwatch.get_current_trace().update(
-        metadata={"labels": ["tool_get_message_suggestion"]}
-    )
+    agent_config.add_trace_label("tool_get_message_suggestion")
     # Simulate knowledge base lookup
-    suggestion_data = {
-        "suggested_response": f"I understand your concern about: {customer_query}. Let me help you with that.",
-        "confidence": "medium",
-        "knowledge_sources": ["general_banking_guide"],
-        "alternatives": ["Ask for more details", "Escalate to specialist"],
-    }
-    return json.dumps(suggestion_data)
+    suggested_response = f"I understand your concern about: {customer_query}. Let me help you with that."
+    return '{"suggested_response":' + _dumps(suggested_response) + _SUGGESTION_TAIL
 
 
 def explore_customer_account(customer_id: str, query: str) -> str:
@@ -136,14 +191,13 @@ def explore_customer_account(customer_id: str, query: str) -> str:
     # Get rich experiences based on query
     rich_experiences = explore_customer_context(customer_id, query)
 
-    langwatch.get_current_trace().update(
-        metadata={"labels": ["tool_explore_customer_account"]}
-    )
+    agent_config.add_trace_label("tool_explore_customer_account")
 
-    return json.dumps(
+    # to_json consumes the generator directly, without building an intermediate list
+    return _dumps(
         {
             "customer_behavior": behavior,
-            "rich_experiences": [
+            "rich_experiences": (
                 {
                     "type": exp.component_type,
                     "title": exp.title,
@@ -152,7 +206,7 @@ def explore_customer_account(customer_id: str, query: str) -> str:
                     "priority": exp.priority,
                 }
                 for exp in rich_experiences
-            ],
+            ),
         }
     )
 
@@ -168,45 +222,82 @@ def escalate_to_human(reason: str, urgency: str = "medium") -> str:
     Returns:
         JSON string with escalation details
     """
-    langwatch.get_current_trace().update(metadata={"labels": ["escalation"]})
-
-    escalation_data = {
-        "escalated": True,
-        "reason": reason,
-        "urgency": urgency,
-        "estimated_wait": "5-10 minutes" if urgency == "high" else "10-15 minutes",
-        "message": "I'm connecting you with a specialist who can provide additional assistance.",
-    }
-    return json.dumps(escalation_data)
+    agent_config.add_trace_label("escalation")
 
+    tail = _ESCALATION_TAIL_HIGH if urgency == "high" else _ESCALATION_TAIL_DEFAULT
+    return (
+        '{"escalated":true,"reason":' + _dumps(reason)
+        + ',"urgency":' + _dumps(urgency) + tail
+    )
 
-# Create the main support agent
-support_agent = Agent(
-    name="BankCustomerSupportAgent",
-    model=Claude(
-        id="claude-opus-4-6",
-        api_key=os.getenv("ANTHROPIC_API_KEY"),
-    ),
-    tools=[
-        get_conversation_summary,
-        get_message_suggestion,
-        explore_customer_account,
-        escalate_to_human,
-    ],
-    description=SYSTEM_PROMPT,
-    add_history_to_context=True,
-    num_history_runs=100,
-    cache_session=True,
+
+# The Haiku and Opus agents keep their sessions in one store and default to the same
+# session, so a conversation keeps its history whichever model answers a turn. Sessions
+# are read from the store on every run rather than cached per agent, since the other
+# agent may have added a turn since.
+support_db = InMemoryDb()
+CHAT_SESSION_ID = str(uuid4())
+
+
+def _build_support_agent(model: Claude) -> Agent:
+    """Create the support agent on the given model; both variants share tools, prompt and sessions"""
+    return Agent(
+        name="BankCustomerSupportAgent",
+        model=model,
+        tools=[
+            get_conversation_summary,
+            get_message_suggestion,
+            explore_customer_account,
+            escalate_to_human,
+        ],
+        description=SYSTEM_PROMPT,
+        db=support_db,
+        session_id=CHAT_SESSION_ID,
+        add_history_to_context=True,
+        num_history_runs=10,
+    )
+
+
+# Create the main support agent, and its Opus counterpart for complex turns
+support_agent = _build_support_agent(haiku_model)
+escalation_agent = _build_support_agent(opus_model)
+
+
+# Situations where SYSTEM_PROMPT requires tool planning or escalation
+_COMPLEX_QUERY_PATTERN = re.compile(
+    r"fraud|unauthori[sz]ed|suspicious|stolen|security|dispute|spending|budget|"
+    r"manager|supervisor|human|payroll|employee|business|locked",
+    re.IGNORECASE,
 )
+COMPLEX_QUERY_MIN_LENGTH = 400
+
+
+def should_escalate(message: str) -> bool:
+    """Whether a message needs Opus rather than Haiku"""
+    return len(message) >= COMPLEX_QUERY_MIN_LENGTH or bool(_COMPLEX_QUERY_PATTERN.search(message))
+
+
+def agent_for(message: str) -> Agent:
+    """The support agent that should answer message: Opus for complex turns, Haiku otherwise"""
+    return escalation_agent if should_escalate(message) else support_agent
 
 
 # Simple interface for testing
 def chat_with_agent(message: str) -> str:
     """Simple interface to chat with the agent"""
-    response = support_agent.run(message)
+    with agent_config.batch_trace_labels():
+        response = agent_for(message).run(message)
     return response.content
 
 
+def stream_chat_with_agent(message: str) -> Iterator[str]:
+    """Stream the agent's reply, yielding text chunks as the model produces them"""
+    with agent_config.batch_trace_labels():
+        for event in agent_for(message).run(message, stream=True):
+            if isinstance(event, RunContentEvent) and event.content:
+                yield event.content
+
+
 # Example usage
 if __name__ == "__main__":
     print("=== Bank Customer Support Agent ===")
@@ -218,14 +309,18 @@ if __name__ == "__main__":
     customer_message = "Hi, I'm seeing some transactions on my account that I don't recognize. I'm worried about fraud."
     print(f"\nCustomer: {customer_message}")
 
-    response = chat_with_agent(customer_message)
-    print(f"Agent: {response}")
+    print("Agent: ", end="", flush=True)
+    for chunk in stream_chat_with_agent(customer_message):
+        print(chunk, end="", flush=True)
+    print()
 
     # Continue conversation
     customer_message2 = "Yes, there's an $85 charge from Amazon and a $45 gas station charge. Can you help me freeze my card?"
     print(f"\nCustomer: {customer_message2}")
 
-    response2 = chat_with_agent(customer_message2)
-    print(f"Agent: {response2}")
+    print("Agent: ", end="", flush=True)
+    for chunk in stream_chat_with_agent(customer_message2):
+        print(chunk, end="", flush=True)
+    print()
 
     print("\n=== Conversation Complete ===")
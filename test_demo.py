@@ -4,24 +4,28 @@ Demo test showing proper Scenario usage with tool call validation
 This demonstrates the key capabilities for the customer demo.
 """
 import asyncio
-import json
-import sys
-import os
-import dotenv
-
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import re
+from functools import lru_cache
+from pydantic_core import from_json
 
 import scenario
 from main_support_agent import support_agent
 
-dotenv.load_dotenv()
-scenario.configure(default_model="openai/gpt-4o-mini")
+# Scenario's default model while this module runs, applied by the root conftest
+SCENARIO_MODEL = "openai/gpt-4o-mini"
+
+_FRAUD_RE = re.compile(r"fraud|security|unauthorized|suspicious", re.IGNORECASE)
+
+@lru_cache(maxsize=128)
+def _tool_arguments(arguments: str) -> dict:
+    """Parse a tool call's JSON arguments once per distinct string; treat the result as read-only"""
+    return from_json(arguments)
 
 class BankSupportAgentAdapter(scenario.AgentAdapter):
     async def call(self, input: scenario.AgentInput) -> scenario.AgentReturnTypes:
         message_content = input.last_new_user_message_str()
-        response = support_agent.run(message_content)
+        # Each scenario gets its own session, so concurrent scenarios don't share history
+        response = await support_agent.arun(message_content, session_id=input.thread_id)
         return response.content
 
 async def test_fraud_with_tool_validation():
@@ -43,13 +47,12 @@ async def test_fraud_with_tool_validation():
         if has_exploration:
             tool_call = state.last_tool_call("explore_customer_account")
             if tool_call:
-                args = json.loads(tool_call["function"]["arguments"])
+                args = _tool_arguments(tool_call["function"]["arguments"])
                 print(f"   Tool arguments: {args}")
 
                 # Validate the arguments make sense for fraud
-                query = args.get("query", "").lower()
-                fraud_keywords = ["fraud", "security", "unauthorized", "suspicious"]
-                has_fraud_context = any(keyword in query for keyword in fraud_keywords)
+                query = args.get("query", "")
+                has_fraud_context = bool(_FRAUD_RE.search(query))
                 print(f"   Query contains fraud context: {has_fraud_context}")
 
         # For demo purposes, let's be flexible - either exploration or escalation is appropriate
@@ -111,7 +114,7 @@ async def test_escalation_detection():
         if has_escalation:
             tool_call = state.last_tool_call("escalate_to_human")
             if tool_call:
-                args = json.loads(tool_call["function"]["arguments"])
+                args = _tool_arguments(tool_call["function"]["arguments"])
                 reason = args.get("reason", "")
                 urgency = args.get("urgency", "medium")
                 print(f"   Escalation reason: {reason}")
@@ -153,6 +156,8 @@ async def main():
     print("🚀 Bank Customer Support Agent - Scenario Demo")
     print("=" * 50)
 
+    # Run one after the other: each scenario prints its conversation as it goes,
+    # and running them concurrently would interleave the two transcripts
     # Test 1: Fraud Investigation
     fraud_passed = await test_fraud_with_tool_validation()
 
@@ -176,5 +181,9 @@ async def main():
         print("   • Automated quality assessment")
 
 if __name__ == "__main__":
+    import dotenv
+
+    dotenv.load_dotenv()
+    scenario.configure(default_model=SCENARIO_MODEL)
     asyncio.run(main())
 
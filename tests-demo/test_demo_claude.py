@@ -5,20 +5,16 @@ These tests cover real business scenarios and validate tool calling behavior
 using Claude Sonnet 4.5 model for evaluation.
 """
 import asyncio
+import re
 import pytest
-import json
-import sys
-import os
-import dotenv
-
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from operator import attrgetter
+from typing import NamedTuple
+from pydantic_core import from_json, to_json
 
 import scenario
-from main_support_agent_claude import support_agent
 
-dotenv.load_dotenv()
-scenario.configure(default_model="openai/gpt-4o")
+# Scenario's default model while this module runs, applied by the root conftest
+SCENARIO_MODEL = "openai/gpt-4o"
 
 
 def _parse_tool_arguments(tool_call: dict) -> dict:
@@ -27,8 +23,8 @@ def _parse_tool_arguments(tool_call: dict) -> dict:
         return raw_args
     if isinstance(raw_args, str):
         try:
-            return json.loads(raw_args)
-        except json.JSONDecodeError:
+            return from_json(raw_args)
+        except ValueError:
             return {}
     return {}
 
@@ -37,13 +33,20 @@ def _assert_success(result: scenario.ScenarioResult, test_name: str) -> None:
     assert result.success, f"{test_name} failed: {result.reasoning or 'No failure reasoning returned'}"
 
 
+# Encoding of a missing tool payload, reused instead of serializing an empty dict per tool
+_EMPTY_JSON = "{}"
+
+
+def _encode(value) -> str:
+    return to_json(value).decode() if value else _EMPTY_JSON
+
+
 def _build_tool_trace_messages(response) -> list[dict]:
     messages: list[dict] = []
     for i, tool in enumerate(response.tools or []):
         tool_call_id = tool.tool_call_id or f"tool_call_{i}"
-        tool_name = tool.tool_name or "unknown_tool"
-        tool_args = tool.tool_args if isinstance(tool.tool_args, dict) else {}
-        tool_result = tool.result if isinstance(tool.result, str) else json.dumps(tool.result or {})
+        tool_args = tool.tool_args
+        tool_result = tool.result
 
         messages.append(
             {
@@ -54,8 +57,8 @@ def _build_tool_trace_messages(response) -> list[dict]:
                         "id": tool_call_id,
                         "type": "function",
                         "function": {
-                            "name": tool_name,
-                            "arguments": json.dumps(tool_args),
+                            "name": tool.tool_name or "unknown_tool",
+                            "arguments": _encode(tool_args) if type(tool_args) is dict else _EMPTY_JSON,
                         },
                     }
                 ],
@@ -65,7 +68,7 @@ def _build_tool_trace_messages(response) -> list[dict]:
             {
                 "role": "tool",
                 "tool_call_id": tool_call_id,
-                "content": tool_result,
+                "content": tool_result if type(tool_result) is str else _encode(tool_result),
             }
         )
 
@@ -79,8 +82,11 @@ class BankSupportAgentAdapter(scenario.AgentAdapter):
     """Adapter for our main bank support agent"""
 
     async def call(self, input: scenario.AgentInput) -> scenario.AgentReturnTypes:
+        # Imported on first use, so collecting (or skipping) these tests doesn't build the agent
+        from main_support_agent_claude import agent_for
+
         message_content = input.last_new_user_message_str()
-        response = support_agent.run(message_content, session_id=input.thread_id)
+        response = await agent_for(message_content).arun(message_content, session_id=input.thread_id)
 
         # Use synthetic tool trace messages — these properly pair tool calls
         # with their results, avoiding missing tool_call_id issues with
@@ -93,32 +99,62 @@ class BankSupportAgentAdapter(scenario.AgentAdapter):
         return response.content  # type: ignore
 
 
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_fraud_investigation_workflow():
-    result = await scenario.run(
+# Agents are stateless between calls, so every scenario in the module shares them
+SUPPORT_AGENT = BankSupportAgentAdapter()
+USER_SIMULATOR = scenario.UserSimulatorAgent(model="openai/gpt-4o")
+
+
+def _judge(criteria: list[str]) -> scenario.JudgeAgent:
+    return scenario.JudgeAgent(model="openai/gpt-4o", criteria=criteria)
+
+
+# Any of these (as substrings, case-insensitive) shows the escalation reason reflects the demand
+_ESCALATION_REASON_RE = re.compile(r"frustrated|manager|human|escalation", re.IGNORECASE)
+
+
+def check_escalation_called(state: scenario.ScenarioState):
+    """Verify agent escalates when customer explicitly demands human help"""
+    assert state.has_tool_call(
+        "escalate_to_human"
+    ), "Agent should escalate when customer demands manager/human help"
+
+    tool_call = state.last_tool_call("escalate_to_human")
+    if tool_call:
+        args = _parse_tool_arguments(tool_call)
+        reason = args.get("reason", "")
+        assert _ESCALATION_REASON_RE.search(
+            reason
+        ), "Escalation reason should reflect customer's frustration and demand"
+
+
+class ScenarioSpec(NamedTuple):
+    """One business scenario: what the user simulator plays and what the judge checks"""
+    id: str
+    name: str
+    description: str
+    criteria: tuple[str, ...]
+    script: tuple
+
+
+# Built once at import; criteria and scripts are immutable so every run shares them
+SCENARIOS = (
+    ScenarioSpec(
+        id="fraud_investigation_workflow",
         name="fraud investigation and card security - Claude",
         description="""
             Customer discovers unauthorized transactions on their account and is worried about fraud.
             They need immediate help to secure their account and investigate the suspicious activity.
             This tests whether the agent responds with appropriate urgency and offers concrete security actions.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent takes fraud concerns seriously and responds with urgency",
-                    "Agent gathers necessary information (account details) to investigate",
-                    "Agent offers concrete security actions like card freezing or blocking",
-                    "Agent provides clear next steps for fraud investigation and dispute process",
-                    "Agent maintains professional and reassuring tone throughout",
-                    "Agent does not re-ask for customer ID that was already provided",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent takes fraud concerns seriously and responds with urgency",
+            "Agent gathers necessary information (account details) to investigate",
+            "Agent offers concrete security actions like card freezing or blocking",
+            "Agent provides clear next steps for fraud investigation and dispute process",
+            "Agent maintains professional and reassuring tone throughout",
+            "Agent does not re-ask for customer ID that was already provided",
+        ),
+        script=(
             scenario.user(
                 "Hi, I just checked my account and there are transactions I didn't make. I think my card was stolen!"
             ),
@@ -132,51 +168,23 @@ async def test_fraud_investigation_workflow():
             ),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    _assert_success(result, "Fraud investigation test")
-
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_escalation_workflow():
-    def check_escalation_called(state: scenario.ScenarioState):
-        """Verify agent escalates when customer explicitly demands human help"""
-        assert state.has_tool_call(
-            "escalate_to_human"
-        ), "Agent should escalate when customer demands manager/human help"
-
-        tool_call = state.last_tool_call("escalate_to_human")
-        if tool_call:
-            args = _parse_tool_arguments(tool_call)
-            reason = args.get("reason", "").lower()
-            assert any(
-                keyword in reason
-                for keyword in ["frustrated", "manager", "human", "escalation"]
-            ), "Escalation reason should reflect customer's frustration and demand"
-
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="escalation_workflow",
         name="customer escalation to human agent - Claude",
         description="""
             Customer has been dealing with an ongoing issue and is frustrated.
             They explicitly demand to speak with a human agent or manager.
             The agent should handle this professionally and escalate appropriately.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent acknowledges customer's frustration empathetically",
-                    "Agent offers to escalate when requested",
-                    "Agent provides escalation timeline and process information",
-                    "Agent maintains professionalism despite customer frustration",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent acknowledges customer's frustration empathetically",
+            "Agent offers to escalate when requested",
+            "Agent provides escalation timeline and process information",
+            "Agent maintains professionalism despite customer frustration",
+        ),
+        script=(
             scenario.user(
                 "I've been calling about this same issue for two weeks and nobody can fix it. I want to speak to a real person who can actually help me!"
             ),
@@ -187,37 +195,24 @@ async def test_escalation_workflow():
             scenario.agent(),
             check_escalation_called,
             scenario.judge(),
-        ],
-    )
-
-    _assert_success(result, "Escalation test")
-
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_complex_issue_triggers_knowledge_base():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="complex_issue_triggers_knowledge_base",
         name="complex multi-issue banking problem - Claude",
         description="""
             Customer has multiple interconnected banking problems: locked online banking,
             unexpected fees, and missing direct deposit. They need systematic help.
             This tests whether the agent can handle multiple issues comprehensively.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent acknowledges ALL three issues (locked banking, fee, missing deposit)",
-                    "Agent provides systematic approach with clear steps for each issue",
-                    "Agent shows empathy for customer's stress and urgency",
-                    "Agent prioritizes the most urgent issue (locked account for bill payments)",
-                    "Agent offers concrete next steps that the customer can act on",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent acknowledges ALL three issues (locked banking, fee, missing deposit)",
+            "Agent provides systematic approach with clear steps for each issue",
+            "Agent shows empathy for customer's stress and urgency",
+            "Agent prioritizes the most urgent issue (locked account for bill payments)",
+            "Agent offers concrete next steps that the customer can act on",
+        ),
+        script=(
             scenario.user(
                 "I have multiple problems with my account. My online banking is locked, there's a $35 fee I don't understand, and my paycheck didn't deposit. My customer ID is CUST_001."
             ),
@@ -227,37 +222,24 @@ async def test_complex_issue_triggers_knowledge_base():
             ),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    _assert_success(result, "Complex issue test")
-
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_urgent_business_scenario():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="urgent_business_scenario",
         name="urgent business account problem - Claude",
         description="""
             Business customer has an urgent issue affecting their operations.
             They can't access funds to pay employees. This tests whether the agent
             recognizes urgency and takes appropriate high-priority action.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent immediately recognizes the business urgency and employee impact",
-                    "Agent responds with high priority and urgency in tone",
-                    "Agent takes concrete action (investigating the freeze or escalating to specialists)",
-                    "Agent provides realistic timeline or sets expectations appropriately",
-                    "Agent offers interim solutions or workarounds if available",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent immediately recognizes the business urgency and employee impact",
+            "Agent responds with high priority and urgency in tone",
+            "Agent takes concrete action (investigating the freeze or escalating to specialists)",
+            "Agent provides realistic timeline or sets expectations appropriately",
+            "Agent offers interim solutions or workarounds if available",
+        ),
+        script=(
             scenario.user(
                 "URGENT: My business account is frozen and I need to pay my employees today. This is costing me money every minute! My business account number is CUST_001."
             ),
@@ -267,68 +249,42 @@ async def test_urgent_business_scenario():
             ),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    _assert_success(result, "Urgent business test")
-
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_simple_inquiry_no_tools():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="simple_inquiry_no_tools",
         name="simple inquiry without tool usage - Claude",
         description="""
             Customer asks a simple question about branch hours or general banking info.
             The agent should answer directly without invoking any tools.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent answers the simple question directly and helpfully",
-                    "Agent does not over-complicate the response",
-                    "Agent maintains a friendly and professional tone",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent answers the simple question directly and helpfully",
+            "Agent does not over-complicate the response",
+            "Agent maintains a friendly and professional tone",
+        ),
+        script=(
             scenario.user(
                 "What are your customer support hours? I just want to know when I can call if I have an issue."
             ),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    _assert_success(result, "Simple inquiry test")
-
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_spending_analysis_request():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="spending_analysis_request",
         name="spending analysis and budgeting help - Claude",
         description="""
             Customer wants to understand their spending patterns and get budgeting advice.
             The agent should use explore_customer_account to analyze their transactions.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent uses account exploration tools to analyze spending",
-                    "Agent provides specific insights about spending categories",
-                    "Agent offers actionable budgeting advice or recommendations",
-                    "Agent is helpful and non-judgmental about spending habits",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent uses account exploration tools to analyze spending",
+            "Agent provides specific insights about spending categories",
+            "Agent offers actionable budgeting advice or recommendations",
+            "Agent is helpful and non-judgmental about spending habits",
+        ),
+        script=(
             scenario.user(
                 "My customer ID is CUST_001. I feel like I'm spending too much lately. Can you help me understand where my money is going?"
             ),
@@ -338,37 +294,24 @@ async def test_spending_analysis_request():
             ),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    _assert_success(result, "Spending analysis test")
-
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_lost_card_replacement():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="lost_card_replacement",
         name="lost card replacement workflow - Claude",
         description="""
             Customer has lost their debit card and needs a replacement.
             Tests whether the agent handles the card replacement process properly
             including immediate security measures.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent treats lost card with appropriate urgency",
-                    "Agent suggests freezing or blocking the lost card immediately",
-                    "Agent explains the replacement card process and timeline",
-                    "Agent asks about any unauthorized transactions since the card was lost",
-                    "Agent reassures the customer about account security",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent treats lost card with appropriate urgency",
+            "Agent suggests freezing or blocking the lost card immediately",
+            "Agent explains the replacement card process and timeline",
+            "Agent asks about any unauthorized transactions since the card was lost",
+            "Agent reassures the customer about account security",
+        ),
+        script=(
             scenario.user(
                 "I lost my debit card somewhere yesterday. I've looked everywhere and can't find it. My customer ID is CUST_001."
             ),
@@ -378,36 +321,23 @@ async def test_lost_card_replacement():
             ),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    _assert_success(result, "Lost card replacement test")
-
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_overdraft_fee_dispute():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="overdraft_fee_dispute",
         name="overdraft fee dispute and resolution - Claude",
         description="""
             Customer with a basic checking account notices an overdraft fee and wants
             it reversed. Tests empathy, account investigation, and fee resolution.
         """,
-        agents=[
-            BankSupportAgentAdapter(),
-            scenario.UserSimulatorAgent(model="openai/gpt-4o"),
-            scenario.JudgeAgent(
-                model="openai/gpt-4o",
-                criteria=[
-                    "Agent shows empathy for the customer's frustration about the fee",
-                    "Agent investigates the account to understand the overdraft situation",
-                    "Agent explains how the overdraft fee occurred",
-                    "Agent offers a resolution path (fee waiver, escalation, or explanation)",
-                    "Agent suggests ways to avoid future overdraft fees",
-                ]
-            ),
-        ],
-        script=[
+        criteria=(
+            "Agent shows empathy for the customer's frustration about the fee",
+            "Agent investigates the account to understand the overdraft situation",
+            "Agent explains how the overdraft fee occurred",
+            "Agent offers a resolution path (fee waiver, escalation, or explanation)",
+            "Agent suggests ways to avoid future overdraft fees",
+        ),
+        script=(
             scenario.user(
                 "I just saw a $35 overdraft fee on my account and I'm really upset. I had money in there! My customer ID is CUST_002."
             ),
@@ -417,11 +347,30 @@ async def test_overdraft_fee_dispute():
             ),
             scenario.agent(),
             scenario.judge(),
-        ],
+        ),
+    ),
+)
+
+
+async def run_scenario(spec: ScenarioSpec) -> scenario.ScenarioResult:
+    return await scenario.run(
+        name=spec.name,
+        description=spec.description,
+        agents=[SUPPORT_AGENT, USER_SIMULATOR, _judge(list(spec.criteria))],
+        script=list(spec.script),
     )
 
-    _assert_success(result, "Overdraft fee dispute test")
+
+@pytest.mark.agent_test
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("spec", SCENARIOS, ids=attrgetter("id"))
+async def test_scenario(spec: ScenarioSpec, scenario_results):
+    _assert_success(await scenario_results[spec.id], spec.name)
 
 
 if __name__ == "__main__":
-    asyncio.run(test_fraud_investigation_workflow())
+    import dotenv
+
+    dotenv.load_dotenv()
+    scenario.configure(default_model=SCENARIO_MODEL)
+    asyncio.run(run_scenario(SCENARIOS[0]))
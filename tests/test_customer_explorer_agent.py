@@ -4,17 +4,33 @@ Tests for the Customer Explorer Agent
 Business scenarios where rich customer data exploration is needed.
 """
 import pytest
-import os
-import sys
-import dotenv
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from operator import attrgetter
+from typing import NamedTuple
 
 import scenario
-from agents.customer_explorer_agent import explore_customer_context, analyze_customer_behavior
-
-dotenv.load_dotenv()
-scenario.configure(default_model="openai/gpt-4o-mini")
+from agno.run.agent import RunContentEvent
+import agent_config
+from agents.customer_explorer_agent import (
+    RichExperience,
+    Transaction,
+    _ArrayElementScanner,
+    _aggregate_transactions,
+    _analyze_profile,
+    get_customer_data,
+    analyze_customer_behavior,
+    explore_customer_context_async,
+    explore_customer_context_stream,
+)
+
+# Scenario's default model while this module runs, applied by the root conftest
+SCENARIO_MODEL = "openai/gpt-4o-mini"
+
+def _assert_success(result: scenario.ScenarioResult, test_name: str) -> None:
+    assert result.success, f"{test_name} failed: {result.reasoning or 'No failure reasoning returned'}"
+
+# Explorer output per (customer, latest message) for the test session. Every scenario
+# here has a single agent turn, so the earlier messages don't change the result.
+_experience_cache = {}
 
 class CustomerExplorerAdapter(scenario.AgentAdapter):
     """Adapter for testing customer data exploration"""
@@ -24,74 +40,203 @@ class CustomerExplorerAdapter(scenario.AgentAdapter):
         customer_id = "CUST_001"
 
         behavior = analyze_customer_behavior(customer_id)
-        rich_experiences = explore_customer_context(customer_id, last_message, input.messages)
-
-        response = f"Customer Analysis for {customer_id}:\n"
-        response += f"Spending: ${behavior.get('total_spending_5_days', 0):.2f}\n"
-        response += f"Risk Indicators: {len([r for r in behavior.get('risk_indicators', {}).values() if r])}\n"
-        response += f"Rich Experiences: {len(rich_experiences)}\n"
-
-        for exp in rich_experiences[:2]:
-            response += f"- {exp.title} (Priority: {exp.priority})\n"
-
-        return response
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_fraud_investigation_analysis():
-    result = await scenario.run(
+        key = (customer_id, last_message)
+        rich_experiences = _experience_cache.get(key)
+        if rich_experiences is None:
+            rich_experiences = _experience_cache[key] = await explore_customer_context_async(
+                customer_id, last_message, input.messages, session_id=input.thread_id
+            )
+
+        lines = [
+            f"Customer Analysis for {customer_id}:",
+            f"Spending: ${behavior.get('total_spending_5_days', 0):.2f}",
+            f"Risk Indicators: {sum(1 for r in behavior.get('risk_indicators', {}).values() if r)}",
+            f"Rich Experiences: {len(rich_experiences)}",
+            *(f"- {exp.title} (Priority: {exp.priority})" for exp in rich_experiences[:2]),
+        ]
+        return "\n".join(lines) + "\n"
+
+# Agents are stateless between calls, so every scenario in the module shares them
+AGENT = CustomerExplorerAdapter()
+USER_SIMULATOR = scenario.UserSimulatorAgent(model=SCENARIO_MODEL)
+
+class ScenarioSpec(NamedTuple):
+    """One business scenario: what the user simulator plays and what the judge checks"""
+    id: str
+    name: str
+    description: str
+    criteria: tuple[str, ...]
+    script: tuple
+
+# Built once at import; criteria and scripts are immutable so every run shares them
+SCENARIOS = (
+    ScenarioSpec(
+        id="fraud_investigation_analysis",
         name="fraud investigation customer analysis",
         description="Customer reports fraud and needs account analysis for security",
-        agents=[
-            CustomerExplorerAdapter(),
-            scenario.UserSimulatorAgent(),
-            scenario.JudgeAgent(criteria=[
-                "Analysis identifies transaction patterns",
-                "Analysis provides security recommendations",
-                "Analysis shows appropriate risk assessment",
-                "Analysis offers account protection measures"
-            ])
-        ],
-        script=[
+        criteria=(
+            "Analysis identifies transaction patterns",
+            "Analysis provides security recommendations",
+            "Analysis shows appropriate risk assessment",
+            "Analysis offers account protection measures",
+        ),
+        script=(
             scenario.user("I see charges I didn't make. Can you analyze my account for fraud?"),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    assert result.success
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_spending_analysis_for_budgeting():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="spending_analysis_for_budgeting",
         name="spending pattern analysis",
         description="Customer wants spending insights for better budgeting",
-        agents=[
-            CustomerExplorerAdapter(),
-            scenario.UserSimulatorAgent(),
-            scenario.JudgeAgent(criteria=[
-                "Analysis provides spending breakdown",
-                "Analysis identifies saving opportunities",
-                "Analysis offers budgeting recommendations",
-                "Analysis shows spending trends"
-            ])
-        ],
-        script=[
+        criteria=(
+            "Analysis provides spending breakdown",
+            "Analysis identifies saving opportunities",
+            "Analysis offers budgeting recommendations",
+            "Analysis shows spending trends",
+        ),
+        script=(
             scenario.user("I want to save money. Can you analyze my spending patterns?"),
             scenario.agent(),
             scenario.judge(),
-        ],
+        ),
+    ),
+)
+
+async def run_scenario(spec: ScenarioSpec) -> scenario.ScenarioResult:
+    return await scenario.run(
+        name=spec.name,
+        description=spec.description,
+        agents=[AGENT, USER_SIMULATOR, scenario.JudgeAgent(model=SCENARIO_MODEL, criteria=list(spec.criteria))],
+        script=list(spec.script),
     )
 
-    assert result.success
+@pytest.mark.agent_test
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("spec", SCENARIOS, ids=attrgetter("id"))
+async def test_scenario(spec: ScenarioSpec, scenario_results):
+    _assert_success(await scenario_results[spec.id], spec.name)
+
+def _card(title: str) -> str:
+    return RichExperience(
+        component_type="transaction_detail",
+        title=title,
+        data={"note": 'braces } ] and "quotes" inside a string'},
+        actions=[{"label": "Freeze Card", "id": "freeze_card"}],
+        priority="high",
+        context="Test component",
+    ).model_dump_json()
+
+def _feed_in_pieces(text: str, size: int) -> list:
+    scanner = _ArrayElementScanner()
+    elements = []
+    for start in range(0, len(text), size):
+        elements.extend(scanner.feed(text[start:start + size]))
+    return elements
+
+@pytest.mark.parametrize("size", [1, 2, 7, 10_000])
+def test_scanner_joins_elements_split_across_chunks(size):
+    text = f"[\n  {_card('First')},\n  {_card('Second')}\n]"
+    elements = _feed_in_pieces(text, size)
+    assert [RichExperience.model_validate_json(e).title for e in elements] == ["First", "Second"]
+
+def test_scanner_ignores_brackets_and_escaped_quotes_in_strings():
+    text = r'[{"a": "}]\\", "b": "say \"}\" ok", "c": [1, {"d": "["}]}]'
+    assert _feed_in_pieces(text, 3) == [text[1:-1]]
+
+@pytest.mark.parametrize("text", ['```json\n[{"a": 1}]', '[1, {"a": 1}]', '{"a": 1}'])
+def test_scanner_abandons_text_that_is_not_an_array_of_objects(text):
+    scanner = _ArrayElementScanner()
+    assert scanner.feed(text) == []
+    assert scanner.feed('[{"a": 1}]') == []
+
+def test_scanner_stops_after_abandon():
+    scanner = _ArrayElementScanner()
+    assert scanner.feed('[{"a": 1}, {"b"') == ['{"a": 1}']
+    scanner.abandon()
+    assert scanner.feed(': 2}]') == []
+
+class _StreamingAgent:
+    """Stands in for the explorer agent, streaming a canned response"""
+
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+
+    async def arun(self, prompt: str, stream: bool = False, session_id=None):
+        for chunk in self.chunks:
+            yield RunContentEvent(content=chunk)
+
+async def _stream_titles(monkeypatch, response: str) -> list:
+    chunks = [response[start:start + 5] for start in range(0, len(response), 5)]
+    monkeypatch.setattr(agent_config, "get_agent", lambda factory: _StreamingAgent(chunks))
+    return [experience.title async for experience in explore_customer_context_stream("CUST_001", "fraud")]
+
+@pytest.mark.asyncio
+async def test_stream_yields_each_component(monkeypatch):
+    titles = await _stream_titles(monkeypatch, f"[{_card('First')}, {_card('Second')}]")
+    assert titles == ["First", "Second"]
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_when_nothing_was_streamed(monkeypatch):
+    titles = await _stream_titles(monkeypatch, "Sorry, I can't help with that.")
+    assert titles == ["Customer Overview - John Smith"]
+
+@pytest.mark.asyncio
+async def test_stream_does_not_append_fallback_to_streamed_components(monkeypatch):
+    titles = await _stream_titles(monkeypatch, f'[{_card("First")}, {{"title": "incomplete"}}]')
+    assert titles == ["First"]
+
+def _transaction(amount: float, category: str = "Shopping", description: str = "Card payment") -> Transaction:
+    return Transaction(date="2024-01-14", amount=amount, description=description, category=category)
+
+def test_aggregate_transactions_splits_debits_and_credits():
+    transactions = [
+        _transaction(-20.0, "Food"),
+        _transaction(-5.5, "Food"),
+        _transaction(-30.0, "Bills"),
+        _transaction(100.0, "Income"),
+        _transaction(0.0, "Adjustment"),
+    ]
+    assert _aggregate_transactions(transactions) == (-55.5, 100.0, 3, {"Food": 25.5, "Bills": 30.0}, False)
+
+def test_aggregate_transactions_of_empty_history():
+    assert _aggregate_transactions([]) == (0.0, 0.0, 0, {}, False)
+
+@pytest.mark.parametrize("description,charged", [
+    ("Overdraft Fee", True),
+    ("MONTHLY FEE", True),
+    ("fees and charges", True),
+    ("Grocery Store", False),
+])
+def test_aggregate_transactions_detects_fees_case_insensitively(description, charged):
+    transactions = [_transaction(-25.0, "Cash", "ATM Withdrawal"), _transaction(-35.0, description=description)]
+    *_, recent_fees = _aggregate_transactions(transactions)
+    assert recent_fees is charged
+
+def test_analyze_profile_without_debits_averages_zero():
+    profile = get_customer_data("CUST_002").model_copy(update={"recent_transactions": (_transaction(800.0, "Income"),)})
+    behavior = _analyze_profile(profile.customer_id, profile)
+    assert behavior["average_transaction"] == 0.0
+    assert behavior["total_spending_5_days"] == 0.0
+    assert behavior["net_cash_flow"] == 800.0
+
+def test_analyze_profile_of_sample_customer():
+    behavior = _analyze_profile("CUST_002", get_customer_data("CUST_002"))
+    assert behavior["spending_by_category"] == {"Cash": 25.0, "Bills": 195.0, "Fees": 35.0}
+    assert behavior["average_transaction"] == 63.75
+    assert behavior["risk_indicators"] == {"low_balance": True, "recent_fees": True, "high_spending": True}
 
 if __name__ == "__main__":
     import asyncio
+    import dotenv
+
+    dotenv.load_dotenv()
+    scenario.configure(default_model=SCENARIO_MODEL)
 
     async def run_test():
         print("Running customer explorer test...")
-        await test_fraud_investigation_analysis()
+        _assert_success(await run_scenario(SCENARIOS[0]), SCENARIOS[0].name)
         print("Test completed!")
 
     asyncio.run(run_test())
\ No newline at end of file
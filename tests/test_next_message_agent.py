@@ -4,17 +4,17 @@ Tests for the Next Message Agent
 Business scenarios where message suggestions and knowledge base guidance are needed.
 """
 import pytest
-import os
-import sys
-import dotenv
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from operator import attrgetter
+from typing import NamedTuple
 
 import scenario
-from agents.next_message_agent import suggest_next_message
+from agents.next_message_agent import suggest_next_message_async
+
+# Scenario's default model while this module runs, applied by the root conftest
+SCENARIO_MODEL = "openai/gpt-4o-mini"
 
-dotenv.load_dotenv()
-scenario.configure(default_model="openai/gpt-4o-mini")
+def _assert_success(result: scenario.ScenarioResult, test_name: str) -> None:
+    assert result.success, f"{test_name} failed: {result.reasoning or 'No failure reasoning returned'}"
 
 class NextMessageAdapter(scenario.AgentAdapter):
     """Adapter for testing message suggestions"""
@@ -23,7 +23,9 @@ class NextMessageAdapter(scenario.AgentAdapter):
         last_message = input.messages[-1]["content"] if input.messages else ""
         conversation_history = [{"role": "customer", "content": msg["content"]} for msg in input.messages[:-1]]
 
-        suggestion = suggest_next_message(last_message, conversation_history)
+        suggestion = await suggest_next_message_async(
+            last_message, conversation_history, session_id=input.thread_id
+        )
 
         response = f"Suggested Response: {suggestion.suggested_message}\n"
         response += f"Confidence: {suggestion.confidence_level}\n"
@@ -32,62 +34,78 @@ class NextMessageAdapter(scenario.AgentAdapter):
 
         return response
 
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_complex_banking_issue_guidance():
-    result = await scenario.run(
+# Agents are stateless between calls, so every scenario in the module shares them
+AGENT = NextMessageAdapter()
+USER_SIMULATOR = scenario.UserSimulatorAgent(model=SCENARIO_MODEL)
+
+class ScenarioSpec(NamedTuple):
+    """One business scenario: what the user simulator plays and what the judge checks"""
+    id: str
+    name: str
+    description: str
+    criteria: tuple[str, ...]
+    script: tuple
+
+# Built once at import; criteria and scripts are immutable so every run shares them
+SCENARIOS = (
+    ScenarioSpec(
+        id="complex_banking_issue_guidance",
         name="complex banking issue resolution guidance",
         description="Customer has complex multi-step banking problem needing expert guidance",
-        agents=[
-            NextMessageAdapter(),
-            scenario.UserSimulatorAgent(),
-            scenario.JudgeAgent(criteria=[
-                "Suggestion provides structured solution approach",
-                "Suggestion uses relevant banking knowledge",
-                "Suggestion addresses problem complexity appropriately",
-                "Suggestion offers clear next steps"
-            ])
-        ],
-        script=[
+        criteria=(
+            "Suggestion provides structured solution approach",
+            "Suggestion uses relevant banking knowledge",
+            "Suggestion addresses problem complexity appropriately",
+            "Suggestion offers clear next steps",
+        ),
+        script=(
             scenario.user("My online banking is locked, I have overdraft fees, and my direct deposit failed. I don't know where to start."),
             scenario.agent(),
             scenario.judge(),
-        ],
-    )
-
-    assert result.success
-
-@pytest.mark.agent_test
-@pytest.mark.asyncio
-async def test_escalation_recommendation():
-    result = await scenario.run(
+        ),
+    ),
+    ScenarioSpec(
+        id="escalation_recommendation",
         name="escalation recommendation for angry customer",
         description="Customer is very frustrated and may need human assistance",
-        agents=[
-            NextMessageAdapter(),
-            scenario.UserSimulatorAgent(),
-            scenario.JudgeAgent(criteria=[
-                "Suggestion recognizes need for escalation",
-                "Suggestion maintains professional tone",
-                "Suggestion offers appropriate escalation path",
-                "Suggestion shows empathy for frustration"
-            ])
-        ],
-        script=[
+        criteria=(
+            "Suggestion recognizes need for escalation",
+            "Suggestion maintains professional tone",
+            "Suggestion offers appropriate escalation path",
+            "Suggestion shows empathy for frustration",
+        ),
+        script=(
             scenario.user("I've called 5 times about this and nobody can help! This is ridiculous!"),
             scenario.agent(),
             scenario.judge(),
-        ],
+        ),
+    ),
+)
+
+async def run_scenario(spec: ScenarioSpec) -> scenario.ScenarioResult:
+    return await scenario.run(
+        name=spec.name,
+        description=spec.description,
+        agents=[AGENT, USER_SIMULATOR, scenario.JudgeAgent(model=SCENARIO_MODEL, criteria=list(spec.criteria))],
+        script=list(spec.script),
     )
 
-    assert result.success
+@pytest.mark.agent_test
+@pytest.mark.asyncio(loop_scope="module")
+@pytest.mark.parametrize("spec", SCENARIOS, ids=attrgetter("id"))
+async def test_scenario(spec: ScenarioSpec, scenario_results):
+    _assert_success(await scenario_results[spec.id], spec.name)
 
 if __name__ == "__main__":
     import asyncio
+    import dotenv
+
+    dotenv.load_dotenv()
+    scenario.configure(default_model=SCENARIO_MODEL)
 
     async def run_test():
         print("Running next message agent test...")
-        await test_complex_banking_issue_guidance()
+        _assert_success(await run_scenario(SCENARIOS[0]), SCENARIOS[0].name)
         print("Test completed!")
 
     asyncio.run(run_test())
\ No newline at end of file